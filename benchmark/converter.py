@@ -0,0 +1,77 @@
+from argparse import ArgumentParser
+from pathlib import Path
+from sys import exit
+from time import perf_counter
+
+from source.expansion import Converter
+
+from .sample import note_html
+
+
+def legacy_run(converter: Converter, html: str) -> dict:
+    """旧版本实现：lxml 解析完整页面后使用 YAML 解析脚本"""
+    return converter._filter_object(
+        converter._convert_object(converter._extract_object(html))
+    )
+
+
+def normalize(data):
+    """YAML 会把 undefined 解析为字符串，JSON 快速路径将其转换为 None"""
+    if isinstance(data, dict):
+        return {k: normalize(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [normalize(i) for i in data]
+    return None if data == "undefined" else data
+
+
+def load_corpus(folder: Path | None, size: int) -> list[tuple[str, str]]:
+    if folder:
+        return [
+            (i.name, i.read_text(encoding="utf-8"))
+            for i in sorted(folder.glob("*.html"))
+        ]
+    return [(f"sample_{i}.html", note_html(i % 2 == 0, seed=i)) for i in range(size)]
+
+
+def measure(function, corpus: list[tuple[str, str]]) -> tuple[float, list]:
+    start = perf_counter()
+    results = [function(html) for __, html in corpus]
+    return perf_counter() - start, results
+
+
+def main():
+    parser = ArgumentParser(description="Converter 解析性能与正确性测试")
+    parser.add_argument(
+        "corpus",
+        nargs="?",
+        type=Path,
+        help="保存的作品页面 HTML 文件夹，未指定时使用生成的测试页面",
+    )
+    parser.add_argument("-n", "--size", type=int, default=20)
+    args = parser.parse_args()
+    converter = Converter()
+    if not (corpus := load_corpus(args.corpus, args.size)):
+        exit("corpus is empty")
+    size = sum(len(html.encode()) for __, html in corpus) / 1024 / 1024
+    legacy, expected = measure(lambda html: legacy_run(converter, html), corpus)
+    current, actual = measure(converter.run, corpus)
+    fallback = sum(converter._fast_convert(html) is None for __, html in corpus)
+    mismatch = [
+        name
+        for (name, __), i, j in zip(corpus, expected, actual)
+        if normalize(i) != normalize(j)
+    ]
+    print(f"pages  : {len(corpus)} ({size:.1f} MB), fallback: {fallback}")
+    print(f"legacy : {legacy / len(corpus) * 1000:.2f} ms/page")
+    print(f"current: {current / len(corpus) * 1000:.2f} ms/page")
+    print(f"speedup: {legacy / current:.1f}x")
+    if mismatch:
+        exit(f"mismatch: {', '.join(mismatch)}")
+    # 生成的测试页面均应由 JSON 快速路径解析
+    if not args.corpus and fallback:
+        exit(f"fast path not used for {fallback} generated pages")
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
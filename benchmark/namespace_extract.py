@@ -0,0 +1,60 @@
+from copy import deepcopy
+from timeit import timeit
+from types import SimpleNamespace
+
+from source.application.explore import Explore
+from source.application.image import Image
+from source.application.video import Video
+from source.expansion import Namespace
+
+from .sample import note_data
+
+
+def legacy_safe_extract(
+    data_object: SimpleNamespace,
+    attribute_chain: str,
+    default="",
+):
+    """旧版本实现：每次调用都会深复制整个数据对象"""
+    data = deepcopy(data_object)
+    for attribute in attribute_chain.split("."):
+        if "[" in attribute:
+            parts = attribute.split("[", 1)
+            attribute = parts[0]
+            try:
+                data = getattr(data, attribute, None)[int(parts[1][:-1])]
+            except (IndexError, TypeError, ValueError):
+                return default
+        else:
+            data = getattr(data, attribute, None)
+            if not data:
+                return default
+    return data or default
+
+
+def process(notes: list[Namespace]) -> None:
+    explore = Explore()
+    for note in notes:
+        explore.run(note)
+        Image.get_image_link(note, "jpeg")
+        Video.deal_video_link(note)
+        Video.get_video_link(note)
+
+
+def main(number: int = 20):
+    notes = [Namespace(note_data(i % 2 == 0, seed=i)) for i in range(10)]
+    current = timeit(lambda: process(notes), number=number)
+    original = vars(Namespace)["_Namespace__safe_extract"]
+    Namespace._Namespace__safe_extract = staticmethod(legacy_safe_extract)
+    try:
+        legacy = timeit(lambda: process(notes), number=number)
+    finally:
+        Namespace._Namespace__safe_extract = original
+    total = len(notes) * number
+    print(f"legacy : {legacy / total * 1000:.3f} ms/note")
+    print(f"current: {current / total * 1000:.3f} ms/note")
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
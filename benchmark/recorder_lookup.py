@@ -0,0 +1,68 @@
+from argparse import ArgumentParser
+from asyncio import run
+from pathlib import Path
+from sqlite3 import connect
+from sys import exit
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from types import SimpleNamespace
+
+from rich import print
+
+from source.module import IDRecorder
+
+
+def create_database(root: Path, size: int) -> None:
+    with connect(root.joinpath("ExploreID.db")) as database:
+        database.execute("CREATE TABLE IF NOT EXISTS explore_id (ID TEXT PRIMARY KEY);")
+        database.executemany(
+            "INSERT INTO explore_id VALUES (?);",
+            ((f"{i:024x}",) for i in range(size)),
+        )
+
+
+async def measure(root: Path, size: int, lookups: int, mode: str) -> bool:
+    manager = SimpleNamespace(
+        root=root,
+        download_record=True,
+        print=lambda: print,
+    )
+    IDRecorder.INDEX_LIMIT = 0 if mode == "bloom" else size
+    start = perf_counter()
+    async with IDRecorder(manager) as recorder:
+        startup = perf_counter() - start
+        if mode == "sqlite":
+            recorder.index = recorder.bloom = None
+        # 一半命中，一半未命中
+        ids = [f"{size - lookups // 2 + i:024x}" for i in range(lookups)]
+        start = perf_counter()
+        hit = sum([bool(await recorder.select(i)) for i in ids])
+        elapsed = perf_counter() - start
+        print(
+            f"{mode:<6}: startup {startup:.2f} s, "
+            f"memory {recorder.index_memory() / 1024 / 1024:.1f} MB, "
+            f"{lookups / elapsed:,.0f} lookups/s, hit {hit}"
+        )
+        # 前一半存在于数据库，布隆过滤器不能漏判，误判需回查数据库排除
+        return hit == lookups // 2
+
+
+def main():
+    parser = ArgumentParser(description="下载记录查询性能测试")
+    parser.add_argument("-n", "--size", type=int, default=200_000)
+    parser.add_argument("-l", "--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+    with TemporaryDirectory() as folder:
+        root = Path(folder)
+        create_database(root, args.size)
+        if mismatch := [
+            mode
+            for mode in ("sqlite", "set", "bloom")
+            if not run(measure(root, args.size, args.lookups, mode))
+        ]:
+            exit(f"mismatch: {', '.join(mismatch)}")
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+from argparse import ArgumentParser
+from asyncio import Queue, gather, run, sleep
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from httpx import AsyncClient
+from rich import print
+
+import source.application.app as application
+from source import XHS
+from source.module import CDNTransport, TaskManager
+from source.module.metrics import DNS_CACHE, DOWNLOAD_CONNECTIONS
+
+from .server import MockServer
+
+try:
+    from resource import RUSAGE_SELF, getrusage
+except ImportError:
+    getrusage = None
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def peak_rss() -> float:
+    """进程峰值内存，单位：MB；Windows 不支持时返回 0"""
+    if not getrusage:
+        return 0.0
+    value = getrusage(RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 单位为字节
+    return value / 1024 / 1024 if value > 1 << 32 else value / 1024
+
+
+def downloaded(folder: Path) -> int:
+    return sum(i.stat().st_size for i in folder.rglob("*") if i.is_file())
+
+
+async def replace_clients(xhs: XHS, server: MockServer, args) -> list:
+    """将程序使用的请求客户端替换为连接本地模拟服务器的客户端；
+    下载客户端仍使用 CDNTransport，统计新建连接数量与域名解析缓存"""
+    manager = xhs.manager
+    await manager.request_client.aclose()
+    await manager.download_client.aclose()
+    transports = []
+    for name, transport in (
+        ("request_client", server.transport()),
+        (
+            "download_client",
+            server.transport(CDNTransport.from_settings({"dns_cache": args.dns_cache})),
+        ),
+    ):
+        client = AsyncClient(
+            transport=transport,
+            headers=manager.blank_headers,
+            timeout=manager.timeout,
+            follow_redirects=True,
+        )
+        setattr(manager, name, client)
+        transports.append(transport)
+    xhs.html.client = manager.request_client
+    xhs.download.client = manager.download_client
+    return transports
+
+
+async def run_workers(items: list, concurrency: int, function) -> list[float]:
+    """使用 concurrency 个协程依次处理 items，返回每项的处理耗时"""
+    queue = Queue()
+    for item in items:
+        queue.put_nowait(item)
+    latency = []
+
+    async def worker():
+        while not queue.empty():
+            item = queue.get_nowait()
+            start = perf_counter()
+            await function(item)
+            latency.append(perf_counter() - start)
+
+    await gather(*(worker() for __ in range(concurrency)))
+    return latency
+
+
+async def scenario_extract(xhs: XHS, args) -> tuple[int, list[float]]:
+    urls = [
+        f"https://www.xiaohongshu.com/explore/{i:024x}?xsec_token=AB{i:x}"
+        for i in range(args.notes)
+    ]
+    latency = await run_workers(
+        urls,
+        args.concurrency,
+        lambda url: xhs.extract(url, args.download),
+    )
+    return len(urls), latency
+
+
+async def scenario_batch(xhs: XHS, args) -> tuple[int, list[float]]:
+    xhs.task_manager = TaskManager()
+    latency = []
+    deal = xhs._batch_deal_extract
+
+    async def timed(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return await deal(*args, **kwargs)
+        finally:
+            latency.append(perf_counter() - start)
+
+    xhs._batch_deal_extract = timed
+    task_id = xhs.create_download_task(
+        "posted",
+        "https://www.xiaohongshu.com/user/profile/000000000000000000000001",
+        # 请求签名需要 a1，模拟服务器不校验签名
+        "a1=benchmark; web_session=benchmark",
+        None,
+        args.notes,
+        False,
+        args.concurrency,
+    )
+    while xhs.task_manager.get(task_id)["status"] in TaskManager.UNFINISHED:
+        await sleep(0.05)
+    task = xhs.task_manager.get(task_id)
+    if task["status"] != "completed":
+        raise RuntimeError(task["errors"])
+    return task["progress"]["all"], latency
+
+
+async def scenario_download(xhs: XHS, args) -> tuple[int, list[float]]:
+    notes = [
+        (
+            (
+                [f"https://sns-img-bd.xhscdn.com/benchmark/{i}_{j}" for j in range(9)],
+                "图文",
+            )
+            if i % args.video_every
+            else ([f"https://sns-video-bd.xhscdn.com/benchmark/{i}"], "视频")
+        )
+        for i in range(args.notes)
+    ]
+    index = iter(range(len(notes)))
+
+    async def download(note):
+        urls, type_ = note
+        await xhs.download.run(
+            urls,
+            ["" for __ in urls],
+            None,
+            "",
+            f"benchmark_{next(index)}",
+            type_,
+            0,
+        )
+
+    latency = await run_workers(notes, args.concurrency, download)
+    return len(notes), latency
+
+
+SCENARIOS = {
+    "extract": scenario_extract,
+    "batch": scenario_batch,
+    "download": scenario_download,
+}
+
+
+async def measure(scenario: str, args) -> dict:
+    with TemporaryDirectory() as folder:
+        root = Path(folder)
+        # 数据库文件写入临时文件夹，避免修改 Volume 中的下载记录与任务；每个场景在独立进程中运行
+        application.ROOT = root
+        async with MockServer(
+            corpus=args.corpus,
+            latency=args.latency / 1000,
+            bandwidth=int(args.bandwidth * 1024 * 1024),
+            error_rate=args.error_rate,
+            image_size=args.image_size * 1024,
+            video_size=args.video_size * 1024 * 1024,
+            pages=(args.notes + 29) // 30,
+            video_every=args.video_every,
+        ) as server:
+            with redirect_stdout(StringIO()):
+                async with XHS(
+                    work_path=str(root),
+                    download_record=False,
+                    record_data=False,
+                    max_retry=args.retry,
+                    concurrency=args.concurrency,
+                    rate_limit={
+                        "mode": "token_bucket",
+                        "rate": 1000,
+                        "max_rate": 1000,
+                        "burst": 1000,
+                    },
+                    retry_policy={"base_delay": 0.05, "max_delay": 0.5},
+                ) as xhs:
+                    transports = await replace_clients(xhs, server, args)
+                    start = perf_counter()
+                    notes, latency = await SCENARIOS[scenario](xhs, args)
+                    elapsed = perf_counter() - start
+                    size = downloaded(xhs.manager.folder)
+    requests = [i for transport in transports for i in transport.latency]
+    return {
+        "scenario": scenario,
+        "notes": notes,
+        "elapsed": elapsed,
+        "notes/s": notes / elapsed,
+        "MB/s": size / 1024 / 1024 / elapsed,
+        "p50": percentile(latency, 50),
+        "p99": percentile(latency, 99),
+        "requests": len(requests),
+        "errors": server.errors,
+        "request p50": percentile(requests, 50),
+        "request p99": percentile(requests, 99),
+        "peak RSS": peak_rss(),
+        "connections": sum(DOWNLOAD_CONNECTIONS.values.values()),
+        "DNS hits": DNS_CACHE.values.get(("hit",), 0),
+    }
+
+
+def run_scenario(scenario: str, args) -> dict:
+    return run(measure(scenario, args))
+
+
+def main():
+    parser = ArgumentParser(description="使用本地模拟服务器测试作品处理与文件下载性能")
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        choices=tuple(SCENARIOS),
+        help="测试场景，未指定时依次运行全部场景",
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        help="保存的作品页面 *.html 与账号作品分页数据 *.json 所在文件夹",
+    )
+    parser.add_argument("-n", "--notes", type=int, default=100, help="作品数量")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="并发数量")
+    parser.add_argument("--download", action="store_true", help="提取作品时下载文件")
+    parser.add_argument(
+        "--latency", type=float, default=20, help="响应延迟，单位：毫秒"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=0,
+        help="单个连接的带宽，单位：MB/s，0 表示不限制",
+    )
+    parser.add_argument("--error-rate", type=float, default=0, help="请求失败比例")
+    parser.add_argument("--retry", type=int, default=2, help="请求失败时的重试次数")
+    parser.add_argument(
+        "--image-size", type=int, default=512, help="图片大小，单位：KB"
+    )
+    parser.add_argument("--video-size", type=int, default=16, help="视频大小，单位：MB")
+    parser.add_argument(
+        "--dns-cache",
+        type=float,
+        default=60,
+        help="下载客户端域名解析结果缓存时间，单位：秒，0 表示不缓存",
+    )
+    parser.add_argument(
+        "--video-every",
+        type=int,
+        default=4,
+        help="每隔多少个作品包含一个视频作品",
+    )
+    args = parser.parse_args()
+    # 每个场景在独立进程中运行，峰值内存互不影响
+    context = get_context("spawn")
+    for scenario in dict.fromkeys(args.scenarios or SCENARIOS):
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            report = executor.submit(run_scenario, scenario, args).result()
+        print(
+            f"{report['scenario']:<8}: {report['notes']} notes in "
+            f"{report['elapsed']:.2f} s, {report['notes/s']:.1f} notes/s, "
+            f"{report['MB/s']:.1f} MB/s, "
+            f"latency p50 {report['p50'] * 1000:.0f} ms / "
+            f"p99 {report['p99'] * 1000:.0f} ms, "
+            f"{report['requests']} requests ({report['errors']} errors) "
+            f"p50 {report['request p50'] * 1000:.0f} ms / "
+            f"p99 {report['request p99'] * 1000:.0f} ms, "
+            f"{report['connections']} download connections "
+            f"({report['DNS hits']} DNS cache hits), "
+            f"peak RSS {report['peak RSS']:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+from json import dumps
+from random import Random
+
+__all__ = ["note_data", "note_html"]
+
+TOKEN = "1040g2sg31{0:0>20}"
+
+
+def _image(random: Random, index: int, live: bool) -> dict:
+    token = TOKEN.format(random.getrandbits(64))
+    return {
+        "fileId": "",
+        "height": 1920,
+        "width": 1440,
+        "url": f"http://sns-webpic-qc.xhscdn.com/202601010000/{index:032x}/{token}!nd_prv_wlteh_webp_3",
+        "urlDefault": f"http://sns-webpic-qc.xhscdn.com/202601010000/{index:032x}/{token}!nd_dft_wlteh_webp_3",
+        "urlPre": f"http://sns-webpic-qc.xhscdn.com/202601010000/{index:032x}/{token}!nd_prv_wlteh_webp_3",
+        "livePhoto": live,
+        "traceId": token,
+        "infoList": [
+            {
+                "imageScene": scene,
+                "url": f"http://sns-webpic-qc.xhscdn.com/202601010000/{index:032x}/{token}!{scene}",
+            }
+            for scene in ("WB_PRV", "WB_DFT")
+        ],
+        "stream": {
+            "h264": [
+                {
+                    "masterUrl": f"http://sns-video-bd.xhscdn.com/stream/110/259/01e{token}_259.mp4",
+                    "backupUrls": [],
+                }
+            ]
+            if live
+            else [],
+            "h265": [],
+            "av1": [],
+        },
+    }
+
+
+def _stream(random: Random, codec: str, count: int) -> list[dict]:
+    return [
+        {
+            "masterUrl": f"http://sns-video-bd.xhscdn.com/stream/1/110/{codec}/{random.getrandbits(64):x}.mp4",
+            "backupUrls": [
+                f"http://sns-bak-v{i}.xhscdn.com/stream/1/110/{codec}/{random.getrandbits(64):x}.mp4"
+                for i in range(2)
+            ],
+            "height": 480 * (i + 1),
+            "width": 270 * (i + 1),
+            "videoBitrate": 500000 * (i + 1),
+            "size": 5000000 * (i + 1),
+            "duration": 60000,
+            "fps": 30,
+            "format": "mp4",
+            "qualityType": "HD",
+        }
+        for i in range(count)
+    ]
+
+
+def note_data(video: bool = False, images: int = 9, seed: int = 0) -> dict:
+    """生成结构与作品页面 __INITIAL_STATE__ 中作品对象相近的测试数据"""
+    random = Random(seed)
+    note_id = f"{random.getrandbits(96):024x}"
+    data = {
+        "noteId": note_id,
+        "type": "video" if video else "normal",
+        "title": "测试作品标题" * 3,
+        "desc": '测试作品描述，包含 #话题[话题]#、"undefined" 与换行\n' * 40,
+        "time": 1767225600000 + seed * 1000,
+        "lastUpdateTime": 1767229200000 + seed * 1000,
+        "ipLocation": "上海",
+        "xsecToken": f"AB{random.getrandbits(128):x}",
+        "interactInfo": {
+            "collected": False,
+            "collectedCount": str(random.randint(0, 10000)),
+            "commentCount": str(random.randint(0, 10000)),
+            "shareCount": str(random.randint(0, 10000)),
+            "liked": False,
+            "likedCount": str(random.randint(0, 100000)),
+            "followed": False,
+            "relation": "none",
+        },
+        "tagList": [
+            {"id": f"{random.getrandbits(64):x}", "name": f"标签{i}", "type": "topic"}
+            for i in range(10)
+        ],
+        "atUserList": [],
+        "user": {
+            "userId": f"{random.getrandbits(96):024x}",
+            "nickname": "测试作者",
+            "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/test.jpg",
+        },
+        "imageList": [
+            _image(random, i, live=not video and i % 3 == 0)
+            for i in range(1 if video else images)
+        ],
+    }
+    if video:
+        data["video"] = {
+            "consumer": {"originVideoKey": f"pre_post/{random.getrandbits(96):x}"},
+            "media": {
+                "videoId": random.getrandbits(60),
+                "stream": {
+                    "h264": _stream(random, "h264", 4),
+                    "h265": _stream(random, "h265", 4),
+                    "av1": [],
+                },
+            },
+        }
+    return data
+
+
+def note_html(video: bool = False, images: int = 9, seed: int = 0) -> str:
+    """生成包含 window.__INITIAL_STATE__ 的作品页面"""
+    note = note_data(video, images, seed)
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30}},
+        "user": {"loggedIn": False, "userInfo": "__undefined__"},
+        "note": {
+            "noteDetailMap": {
+                note["noteId"]: {
+                    "comments": {"list": [], "cursor": "", "hasMore": True},
+                    "currentComment": "__undefined__",
+                    "currentTime": 1767225600000,
+                    "note": note,
+                }
+            },
+            "serverRequestInfo": {"state": "success", "errorCode": 0},
+        },
+        # 模拟页面中与作品无关的大量数据
+        "feed": {
+            "feeds": [note_data(i % 2 == 0, 3, seed + i + 1) for i in range(20)],
+        },
+    }
+    script = dumps(state, ensure_ascii=False).replace('"__undefined__"', "undefined")
+    return (
+        "<!doctype html><html><head><meta charset=utf-8>"
+        "<title>小红书</title>"
+        '<script>window.__SETUP_SERVER_STATE__={"LAUNCHER_SSR":true}</script>'
+        "</head><body><div id=app></div>"
+        f"<script>window.__INITIAL_STATE__={script}</script>"
+        "<script>console.log(1)</script>"
+        "</body></html>"
+    )
@@ -0,0 +1,231 @@
+from asyncio import create_task, sleep
+from functools import lru_cache
+from json import dumps, loads
+from pathlib import Path
+from random import Random
+from time import perf_counter
+
+from httpx import AsyncBaseTransport, AsyncHTTPTransport, Request, Response
+from uvicorn import Config, Server
+
+from .sample import note_html
+
+__all__ = ["MockServer", "ReplayTransport"]
+
+PNG = b"\x89PNG\r\n\x1a\n"
+MP4 = b"\x00\x00\x00\x20ftypisom"
+
+
+class MockServer:
+    """本地模拟小红书服务器，按请求的 Host 返回作品页面、账号作品分页数据或 CDN 文件
+
+    corpus 文件夹中的 *.html 作为作品页面轮流返回，*.json 按文件名顺序作为分页数据返回；
+    未提供时使用生成的测试数据
+    """
+
+    def __init__(
+        self,
+        corpus: Path = None,
+        latency: float = 0.0,
+        bandwidth: int = 0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        image_size: int = 512 * 1024,
+        video_size: int = 16 * 1024 * 1024,
+        pages: int = 10,
+        page_size: int = 30,
+        video_every: int = 4,
+        seed: int = 0,
+    ):
+        """
+        :param latency: 每个请求返回响应头前的等待时间，单位：秒
+        :param bandwidth: 单个连接的传输速率上限，单位：字节/秒，0 表示不限制
+        :param error_rate: 返回 error_status 的请求比例
+        :param video_every: 每隔多少个作品生成一个视频作品
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.pages = pages
+        self.page_size = page_size
+        self.video_every = video_every
+        self.random = Random(seed)
+        self.media = {
+            "image": PNG + bytes(image_size - len(PNG)),
+            "video": MP4 + bytes(video_size - len(MP4)),
+        }
+        self.html = []
+        self.json = []
+        if corpus:
+            self.html = [
+                i.read_text(encoding="utf-8") for i in sorted(corpus.glob("*.html"))
+            ]
+            self.json = [
+                loads(i.read_text(encoding="utf-8"))
+                for i in sorted(corpus.glob("*.json"))
+            ]
+        self.requests = 0
+        self.errors = 0
+        self.sent = 0
+        self.server: Server | None = None
+        self.port = 0
+
+    async def __aenter__(self):
+        self.server = Server(
+            Config(
+                self,
+                host="127.0.0.1",
+                port=0,
+                log_level="warning",
+                lifespan="off",
+            )
+        )
+        self.task = create_task(self.server.serve())
+        while not self.server.started:
+            await sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.server.should_exit = True
+        await self.task
+
+    def transport(self, transport: AsyncBaseTransport = None) -> "ReplayTransport":
+        return ReplayTransport(self.port, transport)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        self.requests += 1
+        headers = {k.decode(): v.decode() for k, v in scope["headers"]}
+        host = headers.get("host", "").split(":")[0]
+        if self.latency:
+            await sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            await self.__send(send, self.error_status, b"error", "text/plain")
+            return
+        path = scope["path"]
+        if host == "edith.xiaohongshu.com":
+            body = dumps(self.__page(scope["query_string"].decode())).encode()
+            await self.__send(send, 200, body, "application/json")
+        elif host.endswith("xiaohongshu.com") and not host.startswith("ci."):
+            body = self.__note(path.rstrip("/").split("/")[-1]).encode()
+            await self.__send(send, 200, body, "text/html; charset=utf-8")
+        else:
+            await self.__media(scope, send, headers, host)
+
+    def __page(self, query: str) -> dict:
+        params = dict(i.split("=", 1) for i in query.split("&") if "=" in i)
+        index = int(params.get("cursor") or 0)
+        if self.json:
+            return self.json[index] if index < len(self.json) else {"data": {}}
+        start = index * self.page_size
+        return {
+            "code": 0,
+            "success": True,
+            "data": {
+                "notes": [
+                    {"note_id": f"{i:024x}", "xsec_token": f"AB{i:x}"}
+                    for i in range(start, start + self.page_size)
+                ],
+                "cursor": str(index + 1),
+                "has_more": index + 1 < self.pages,
+            },
+        }
+
+    def __note(self, note_id: str) -> str:
+        try:
+            index = int(note_id, 16)
+        except ValueError:
+            index = sum(note_id.encode())
+        if self.html:
+            return self.html[index % len(self.html)]
+        return self.__generate(index, index % self.video_every == 0)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def __generate(index: int, video: bool) -> str:
+        return note_html(video, seed=index)
+
+    async def __media(self, scope, send, headers: dict, host: str):
+        data = self.media["video" if "video" in host else "image"]
+        start, end = 0, len(data) - 1
+        status = 200
+        response = [
+            (b"content-type", b"application/octet-stream"),
+            (b"accept-ranges", b"bytes"),
+        ]
+        if range_ := headers.get("range", "").removeprefix("bytes="):
+            first, __, last = range_.partition("-")
+            start = int(first or 0)
+            end = min(int(last), end) if last else end
+            if start > end:
+                await self.__send(send, 416, b"", "text/plain")
+                return
+            status = 206
+            response.append(
+                (b"content-range", f"bytes {start}-{end}/{len(data)}".encode())
+            )
+        response.append((b"content-length", str(end - start + 1).encode()))
+        await send(
+            {"type": "http.response.start", "status": status, "headers": response}
+        )
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+        chunk = 64 * 1024
+        begin = perf_counter()
+        for offset in range(start, end + 1, chunk):
+            block = data[offset : min(offset + chunk, end + 1)]
+            await send({"type": "http.response.body", "body": block, "more_body": True})
+            self.sent += len(block)
+            if self.bandwidth:
+                # 按已发送数据量计算应经过的时间，避免误差累积
+                elapsed = perf_counter() - begin
+                if (
+                    delay := (offset - start + len(block)) / self.bandwidth - elapsed
+                ) > 0:
+                    await sleep(delay)
+        await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def __send(send, status: int, body: bytes, content_type: str):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", content_type.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class ReplayTransport(AsyncBaseTransport):
+    """将所有请求转发至本地模拟服务器，保留原始 Host 请求头，并记录各请求的响应耗时
+
+    :param transport: 实际发送请求的传输层，默认使用 httpx 的 AsyncHTTPTransport
+    """
+
+    def __init__(self, port: int, transport: AsyncBaseTransport = None):
+        self.port = port
+        self.transport = transport or AsyncHTTPTransport()
+        self.latency: list[float] = []
+
+    async def handle_async_request(self, request: Request) -> Response:
+        request.url = request.url.copy_with(
+            scheme="http",
+            host="127.0.0.1",
+            port=self.port,
+        )
+        start = perf_counter()
+        response = await self.transport.handle_async_request(request)
+        self.latency.append(perf_counter() - start)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -154,6 +154,7 @@ class CLI:
                 ),
             ),
             ("--max_retry", "-mr", "int", _("请求数据失败时，重试的最大次数")),
+            ("--concurrency", "-cc", "int", _("批量处理作品的最大并发数")),
             ("--record_data", "-rd", "bool", _("是否记录作品数据至文件")),
             (
                 "--image_format",
@@ -272,6 +273,11 @@ class CLI:
     "-mr",
     type=int,
 )
+@option(
+    "--concurrency",
+    "-cc",
+    type=int,
+)
 @option(
     "--record_data",
     "-rd",
@@ -119,7 +119,7 @@ class XHSDownloader(App):
         )
 
     async def close_database(self):
-        await self.APP.id_recorder.cursor.close()
-        await self.APP.id_recorder.database.close()
-        await self.APP.data_recorder.cursor.close()
-        await self.APP.data_recorder.database.close()
+        await self.APP.id_recorder.close()
+        await self.APP.data_recorder.close()
+        await self.APP.map_recorder.close()
+        await self.APP.media_cache.close()
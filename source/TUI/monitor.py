@@ -31,6 +31,7 @@ class Monitor(Screen):
     def compose(self) -> ComposeResult:
         yield Header()
         yield Label(Text(_("已启动监听剪贴板模式"), style=INFO), classes="prompt")
+        yield Label(id="progress", classes="prompt")
         yield RichLog(markup=True, wrap=True)
         yield Button(_("退出监听剪贴板模式"), id="close")
         yield Footer()
@@ -48,6 +49,19 @@ class Monitor(Screen):
         self.title = PROJECT
         self.xhs.print.func = self.query_one(RichLog)
         self.run_monitor()
+        self.set_interval(1, self.update_progress)
+
+    def update_progress(self) -> None:
+        progress = self.xhs.monitor_progress()
+        self.query_one("#progress", Label).update(
+            Text(
+                _(
+                    "已处理 {finished}/{all} 个作品，成功 {success}，失败 {fail}，"
+                    "跳过 {skip}，每分钟 {rate:.1f} 个"
+                ).format(**progress),
+                style=INFO,
+            )
+        )
 
     async def action_close(self):
         self.xhs.stop_monitor()
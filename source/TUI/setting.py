@@ -114,6 +114,16 @@ class Setting(Screen):
                 type="integer",
                 id="max_retry",
             ),
+            Label(
+                _("批量处理作品的最大并发数"),
+                classes="params",
+            ),
+            Input(
+                str(self.data["concurrency"]),
+                placeholder="1",
+                type="integer",
+                id="concurrency",
+            ),
             Label(),
             Container(
                 Checkbox(
@@ -233,7 +243,8 @@ class Setting(Screen):
     @on(Button.Pressed, "#save")
     def save_settings(self):
         self.dismiss(
-            {
+            self.data
+            | {
                 "mapping_data": self.data.get("mapping_data", {}),
                 "work_path": self.query_one("#work_path").value,
                 "folder_name": self.query_one("#folder_name").value,
@@ -244,6 +255,7 @@ class Setting(Screen):
                 "timeout": int(self.query_one("#timeout").value),
                 "chunk": int(self.query_one("#chunk").value),
                 "max_retry": int(self.query_one("#max_retry").value),
+                "concurrency": int(self.query_one("#concurrency").value),
                 "record_data": self.query_one("#record_data").value,
                 "image_format": self.query_one("#image_format").value.lower(),
                 "folder_mode": self.query_one("#folder_mode").value,
@@ -1,23 +1,30 @@
 from asyncio import (
     Event,
     Queue,
-    QueueEmpty,
+    Semaphore,
     create_task,
+    current_task,
     gather,
     sleep,
+    wait_for,
     Future,
     CancelledError,
 )
+from collections import Counter, deque
 from contextlib import suppress
+from csv import writer
+from io import StringIO
+from time import perf_counter
 from datetime import datetime
+from hashlib import sha256
 from json import dumps
 from re import compile
 from urllib.parse import urlparse
 from textwrap import dedent
-from fastapi import FastAPI, HTTPException, Path
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Path, Query, Request
+from fastapi.responses import PlainTextResponse, RedirectResponse, StreamingResponse
 from fastmcp import FastMCP
-from typing import Annotated
+from typing import Annotated, Literal
 from pydantic import Field
 from types import SimpleNamespace
 from pyperclip import copy, paste
@@ -29,14 +36,18 @@ from ..expansion import (
     Cleaner,
     Converter,
     Namespace,
+    QueueFullError,
     beautify_string,
 )
 from ..module import (
     BatchDownloadParams,
+    BatchExtractParams,
     DownloadShareParams,
     DownloadShareResponse,
     DownloadStatistics,
     SQLiteDataResponse,
+    SQLitePageResponse,
+    SQLiteQueryParams,
     TaskAcceptedResponse,
     TaskManager,
     TaskStatusResponse,
@@ -55,6 +66,14 @@ from ..module import (
     IDRecorder,
     Manager,
     MapRecorder,
+    MediaCache,
+    TaskRecorder,
+    JOB_QUEUE,
+    PARSE_DURATION,
+    RATE_LIMIT,
+    REGISTRY,
+    TASK_PROGRESS,
+    TASKS,
     logging,
     # sleep_time,
     ScriptServer,
@@ -150,6 +169,30 @@ class XHS:
             "NAME": "author_name",
         },
     }
+    # 数据查询接口支持的筛选条件
+    SQLITE_FILTERS = {
+        "explore_data": {
+            "author_id": '"作者ID" = ?',
+            "note_type": '"作品类型" = ?',
+            "published_after": '"发布时间" >= ?',
+            "published_before": '"发布时间" < ?',
+        },
+        "explore_id": {},
+        "mapping_data": {
+            "author_id": "ID = ?",
+        },
+    }
+    # 发布时间为日期格式的记录，排除发布时间未知的记录
+    SQLITE_DATED = "\"发布时间\" GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]_*'"
+    # 数据查询接口每次从数据库读取的记录数量
+    SQLITE_BATCH = 1000
+    # 批量下载任务中等待处理的作品链接数量上限
+    TASK_QUEUE_SIZE = UserPosted.PAGE_SIZE * 2
+    # 任务事件流无事件时发送心跳的间隔，单位：秒
+    TASK_EVENT_KEEPALIVE = 15
+    # 下载本人数据的任务模式，恢复任务前需要确认 Cookie 对应的账号未改变
+    ACCOUNT_MODES = {"liked", "saved"}
+    WEB_SESSION = compile(r"(?:^|;\s*)web_session=([^;]+)")
     __INSTANCE = None
     CLEANER = Cleaner()
 
@@ -185,6 +228,14 @@ class XHS:
         script_server: bool = False,
         script_host="0.0.0.0",
         script_port=5558,
+        concurrency=1,
+        rate_limit: dict = None,
+        download_scheduler: dict = None,
+        segment_download: dict = None,
+        job_scheduler: dict = None,
+        retry_policy: dict = None,
+        download_client: dict = None,
+        media_cache: dict = None,
         **kwargs,
     ):
         switch_language(language)
@@ -212,6 +263,14 @@ class XHS:
             author_archive,
             write_mtime,
             script_server,
+            concurrency,
+            rate_limit,
+            download_scheduler,
+            segment_download,
+            job_scheduler,
+            retry_policy,
+            download_client,
+            media_cache,
             self.CLEANER,
             self.print,
         )
@@ -225,13 +284,24 @@ class XHS:
         self.video = Video()
         self.explore = Explore()
         self.convert = Converter()
-        self.download = Download(self.manager)
+        self.media_cache = MediaCache(self.manager)
+        self.download = Download(self.manager, self.media_cache)
         self.id_recorder = IDRecorder(self.manager)
         self.data_recorder = DataRecorder(self.manager)
+        self.task_recorder = TaskRecorder(self.manager)
         self.task_manager = TaskManager()
+        self.jobs = self.manager.job_scheduler
         self.clipboard_cache: str = ""
         self.queue = Queue()
         self.event = Event()
+        self.monitor_links: set[str] = set()
+        self.monitor_statistics = SimpleNamespace(
+            all=0,
+            success=0,
+            fail=0,
+            skip=0,
+        )
+        self.monitor_start = 0.0
         self.script = None
         self.init_script_server(
             script_host,
@@ -329,22 +399,20 @@ class XHS:
             self.logging(_("提取小红书作品链接失败"), WARNING)
             return []
         statistics = SimpleNamespace(
-            all=len(urls),
+            # 同一作品的多个链接只处理一次
+            all=len({self.__extract_link_id(i) for i in urls}),
             success=0,
             fail=0,
             skip=0,
         )
         self.logging(_("共 {0} 个小红书作品待处理...").format(statistics.all))
-        result = [
-            await self.__deal_extract(
-                i,
-                download,
-                index,
-                data,
-                count=statistics,
-            )
-            for i in urls
-        ]
+        result = await self.__deal_extract_batch(
+            urls,
+            download,
+            index,
+            data,
+            count=statistics,
+        )
         self.show_statistics(
             statistics,
         )
@@ -377,29 +445,29 @@ class XHS:
             self.logging(_("提取小红书作品链接失败"), WARNING)
             return
         if index:
-            await self.__deal_extract(
+            await self.__deal_extract_scheduled(
+                "interactive",
+                "local",
                 url[0],
                 download,
                 index,
                 data,
+                bounded=False,
             )
         else:
             statistics = SimpleNamespace(
-                all=len(url),
+                all=len({self.__extract_link_id(i) for i in url}),
                 success=0,
                 fail=0,
                 skip=0,
             )
-            [
-                await self.__deal_extract(
-                    u,
-                    download,
-                    index,
-                    data,
-                    count=statistics,
-                )
-                for u in url
-            ]
+            await self.__deal_extract_batch(
+                url,
+                download,
+                index,
+                data,
+                count=statistics,
+            )
             self.show_statistics(
                 statistics,
             )
@@ -554,6 +622,229 @@ class XHS:
         self.logging(_("作品处理完成：{0}").format(id_))
         return data
 
+    async def __deal_extract_scheduled(
+        self,
+        priority: str,
+        client: str,
+        *args,
+        bounded: bool = True,
+        **kwargs,
+    ):
+        """在任务调度器分配的槽位中处理作品，队列已满时抛出 QueueFullError；
+        bounded 为 False 时不受队列长度限制，用于本地调用"""
+        async with self.jobs.slot(priority, client, bounded):
+            return await self.__deal_extract(*args, **kwargs)
+
+    def __collect_metrics(self):
+        """更新采集时才计算的指标"""
+        TASKS.clear()
+        TASK_PROGRESS.clear()
+        for status, count in Counter(
+            i["status"] for i in self.task_manager.tasks.values()
+        ).items():
+            TASKS.set(count, status=status)
+        for task in self.task_manager.tasks.values():
+            for field, value in task["progress"].items():
+                TASK_PROGRESS.set(
+                    value,
+                    task_id=task["task_id"],
+                    mode=task["mode"],
+                    status=task["status"],
+                    field=field,
+                )
+        metrics = self.jobs.metrics()
+        JOB_QUEUE.set(metrics["active"], priority="all", field="active")
+        JOB_QUEUE.set(metrics["queued"], priority="all", field="queued")
+        for priority, data in metrics["queues"].items():
+            for field in ("waiting", "submitted", "rejected"):
+                JOB_QUEUE.set(data[field], priority=priority, field=field)
+        RATE_LIMIT.clear()
+        for host, rate in self.manager.limiter.metrics().items():
+            RATE_LIMIT.set(rate, host=host)
+
+    def __check_concurrency(self, concurrency: int | None):
+        # 每个作品都需要获取任务调度器的槽位，超出 workers 的并发只会排队等待
+        if concurrency and concurrency > self.jobs.workers:
+            raise HTTPException(
+                status_code=400,
+                detail=_("concurrency 不能大于任务调度器的 workers：{0}").format(
+                    self.jobs.workers
+                ),
+            )
+
+    @staticmethod
+    def __client_id(request: Request) -> str:
+        return request.client.host if request.client else "unknown"
+
+    @staticmethod
+    def __task_status(task: dict) -> TaskStatusResponse:
+        return TaskStatusResponse(
+            task_id=task["task_id"],
+            mode=task["mode"],
+            status=task["status"],
+            started_at=task["started_at"],
+            finished_at=task["finished_at"],
+            progress=DownloadStatistics(**task["progress"]),
+            summary=DownloadStatistics(**task["summary"]),
+            errors=task["errors"],
+            error_count=task["error_count"],
+        )
+
+    @staticmethod
+    def __server_sent_event(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {dumps(data, ensure_ascii=False)}\n\n"
+
+    async def __task_events(self, task_id: str = None):
+        """先发送任务当前状态，之后仅发送状态变化、进度变化与新增错误信息；
+        指定任务结束后关闭事件流"""
+        queue = self.task_manager.subscribe(task_id)
+        try:
+            for task in self.task_manager.snapshot(task_id):
+                yield self.__server_sent_event(
+                    "snapshot",
+                    self.__task_status(task).model_dump(),
+                )
+                if task_id and task["status"] not in TaskManager.UNFINISHED:
+                    return
+            while True:
+                try:
+                    event = await wait_for(queue.get(), self.TASK_EVENT_KEEPALIVE)
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                # 同一事件对象会发送给多个订阅者，不能修改
+                event = event.copy()
+                if (name := event.pop("event")) == "reset":
+                    # task_id 为 None 时重新发送全部任务的状态
+                    for task in self.task_manager.snapshot(event["task_id"]):
+                        yield self.__server_sent_event(
+                            "snapshot",
+                            self.__task_status(task).model_dump(),
+                        )
+                    continue
+                yield self.__server_sent_event(name, event)
+                if (
+                    task_id
+                    and name == "status"
+                    and event["status"] not in TaskManager.UNFINISHED
+                ):
+                    return
+        finally:
+            self.task_manager.unsubscribe(queue, task_id)
+
+    async def __deal_extract_stream(
+        self,
+        extract: BatchExtractParams,
+        client: str,
+    ):
+        """并发处理多个作品链接，按完成顺序逐个返回处理结果"""
+        links: Queue[tuple[int, str]] = Queue()
+        for item in enumerate(extract.urls):
+            links.put_nowait(item)
+        results: Queue[dict | None] = Queue()
+        cookie = self._resolve_cookie(extract.cookie)
+        proxy = self._resolve_proxy(extract.proxy)
+
+        async def worker():
+            while not links.empty():
+                index, url = links.get_nowait()
+                data = None
+                try:
+                    if not (link := await self.extract_links(url)):
+                        message = _("提取小红书作品链接失败")
+                    else:
+                        data = await self.__deal_extract_scheduled(
+                            "interactive",
+                            client,
+                            link[0],
+                            extract.download,
+                            extract.index,
+                            not extract.skip,
+                            cookie,
+                            proxy,
+                        )
+                        message = (
+                            _("获取小红书作品数据成功")
+                            if data
+                            else _("获取小红书作品数据失败")
+                        )
+                except QueueFullError as error:
+                    message = str(error)
+                except Exception as error:
+                    # 单个链接处理异常时返回错误记录，不中断整个响应
+                    message = _("获取小红书作品数据失败：{0}").format(repr(error))
+                await results.put(
+                    {"index": index, "url": url, "message": message, "data": data}
+                )
+
+        async def run():
+            try:
+                await gather(
+                    *(
+                        worker()
+                        for __ in range(
+                            min(
+                                extract.concurrency or self.manager.concurrency,
+                                len(extract.urls),
+                            )
+                        )
+                    )
+                )
+            finally:
+                results.put_nowait(None)
+
+        task = create_task(run())
+        try:
+            while result := await results.get():
+                yield result
+            await task
+        finally:
+            # 客户端断开连接时停止处理剩余链接
+            task.cancel()
+            with suppress(CancelledError):
+                await task
+
+    async def __deal_extract_batch(
+        self,
+        urls: list[str],
+        download: bool,
+        index: list | tuple | None,
+        data: bool,
+        cookie: str = None,
+        proxy: str = None,
+        count=SimpleNamespace(
+            all=0,
+            success=0,
+            fail=0,
+            skip=0,
+        ),
+    ) -> list:
+        semaphore = Semaphore(self.manager.concurrency)
+        tasks = {}
+
+        async def worker(url: str):
+            # 本地调用在队列已满时等待，不抛出 QueueFullError
+            async with semaphore, self.jobs.slot("interactive", "local", False):
+                return await self.__deal_extract(
+                    url,
+                    download,
+                    index,
+                    data,
+                    cookie,
+                    proxy,
+                    count=count,
+                )
+
+        for url in urls:
+            # 同一作品的多个链接共享处理结果，避免并发写入同一文件
+            if (id_ := self.__extract_link_id(url)) not in tasks:
+                tasks[id_] = create_task(worker(url))
+        try:
+            return list(await gather(*(tasks[self.__extract_link_id(i)] for i in urls)))
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
     async def deal_script_tasks(
         self,
         data: dict,
@@ -609,7 +900,9 @@ class XHS:
         return link.path.split("/")[-1]
 
     def __generate_data_object(self, html: str) -> Namespace:
+        start = perf_counter()
         data = self.convert.run(html)
+        PARSE_DURATION.observe(perf_counter() - start)
         return Namespace(data)
 
     def __naming_rules(self, data: dict) -> str:
@@ -654,7 +947,12 @@ class XHS:
         delay=1,
         download=True,
         data=False,
+        workers: int = None,
     ) -> None:
+        """监听剪贴板并同时处理多个作品
+
+        :param workers: 同时处理的作品数量，默认与任务调度器的 workers 相同
+        """
         self.logging(
             _(
                 "程序会自动读取并提取剪贴板中的小红书作品链接，并自动下载链接对应的作品文件，如需关闭，请点击关闭按钮，或者向剪贴板写入 “close” 文本！"
@@ -663,38 +961,113 @@ class XHS:
         )
         self.event.clear()
         copy("")
-        await gather(
-            self.__get_link(delay),
-            self.__receive_link(delay, download=download, index=None, data=data),
+        workers = workers or self.jobs.workers
+        self.queue = Queue()
+        self.monitor_links.clear()
+        self.monitor_statistics = SimpleNamespace(
+            all=0,
+            success=0,
+            fail=0,
+            skip=0,
         )
+        self.monitor_start = perf_counter()
+        tasks = [
+            create_task(self.__get_link(delay, workers)),
+            *[
+                create_task(
+                    self.__receive_link(download=download, index=None, data=data)
+                )
+                for __ in range(workers)
+            ],
+        ]
+        try:
+            await gather(*tasks)
+        finally:
+            # 任一任务异常退出或监听被取消时，停止其余任务，避免遗留后台任务
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
 
-    async def __get_link(self, delay: int):
+    async def __get_link(self, delay: int, workers: int):
+        pushing = set()
         while not self.event.is_set():
             if (t := paste()).lower() == "close":
                 self.stop_monitor()
             elif t != self.clipboard_cache:
                 self.clipboard_cache = t
-                create_task(self.__push_link(t))
+                task = create_task(self.__push_link(t))
+                pushing.add(task)
+                task.add_done_callback(pushing.discard)
             await sleep(delay)
+        await gather(*pushing)
+        # 处理完队列中剩余的作品后结束
+        for __ in range(workers):
+            await self.queue.put(None)
 
     async def __push_link(
         self,
         content: str,
     ):
-        await gather(
-            *[
-                self.queue.put(i)
-                for i in await self.extract_links(
-                    content,
+        for url in await self.extract_links(
+            content,
+        ):
+            # 跳过已在队列中、正在处理或本次监听已处理的作品
+            if (id_ := self.__extract_link_id(url)) in self.monitor_links:
+                continue
+            self.monitor_links.add(id_)
+            self.monitor_statistics.all += 1
+            await self.queue.put(url)
+
+    async def __receive_link(self, *args, **kwargs):
+        while (url := await self.queue.get()) is not None:
+            count = SimpleNamespace(
+                all=1,
+                success=0,
+                fail=0,
+                skip=0,
+            )
+            try:
+                await self.__deal_extract_scheduled(
+                    "interactive",
+                    "monitor",
+                    url,
+                    *args,
+                    count=count,
+                    **kwargs,
                 )
-            ]
-        )
-
-    async def __receive_link(self, delay: int, *args, **kwargs):
-        while not self.event.is_set() or self.queue.qsize() > 0:
-            with suppress(QueueEmpty):
-                await self.__deal_extract(self.queue.get_nowait(), *args, **kwargs)
-            await sleep(delay)
+            except QueueFullError as error:
+                self.logging(str(error), WARNING)
+                count.fail += 1
+            except Exception as error:
+                # 单个作品处理异常时继续处理后续链接
+                self.logging(
+                    _("获取小红书作品数据失败：{0}").format(repr(error)),
+                    ERROR,
+                )
+                count.fail += 1
+            for key in ("success", "fail", "skip"):
+                setattr(
+                    self.monitor_statistics,
+                    key,
+                    getattr(self.monitor_statistics, key) + getattr(count, key),
+                )
+            if count.fail:
+                # 处理失败的作品允许再次复制链接重试
+                self.monitor_links.discard(self.__extract_link_id(url))
+
+    def monitor_progress(self) -> dict:
+        """监听剪贴板模式的处理进度与每分钟处理作品数量"""
+        statistics = self.monitor_statistics
+        finished = statistics.success + statistics.fail + statistics.skip
+        elapsed = perf_counter() - self.monitor_start if self.monitor_start else 0
+        return {
+            "all": statistics.all,
+            "finished": finished,
+            "success": statistics.success,
+            "fail": statistics.fail,
+            "skip": statistics.skip,
+            "rate": finished / elapsed * 60 if elapsed else 0.0,
+        }
 
     def stop_monitor(self):
         self.event.set()
@@ -706,12 +1079,14 @@ class XHS:
         await self.id_recorder.__aenter__()
         await self.data_recorder.__aenter__()
         await self.map_recorder.__aenter__()
+        await self.media_cache.__aenter__()
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.id_recorder.__aexit__(exc_type, exc_value, traceback)
         await self.data_recorder.__aexit__(exc_type, exc_value, traceback)
         await self.map_recorder.__aexit__(exc_type, exc_value, traceback)
+        await self.media_cache.__aexit__(exc_type, exc_value, traceback)
         await self.close()
 
     async def close(self):
@@ -759,6 +1134,9 @@ class XHS:
             )
         ):
             raise RuntimeError(_("数据库未初始化"))
+        await self.data_recorder.flush()
+        await self.id_recorder.flush()
+        await self.map_recorder.flush()
         return {
             "explore_data": await self.__fetch_table_rows(
                 self.data_recorder.database,
@@ -774,6 +1152,110 @@ class XHS:
             ),
         }
 
+    def __build_sqlite_query(
+        self,
+        table: str,
+        params: SQLiteQueryParams,
+    ) -> tuple[str, list[str], list]:
+        columns = {v: k for k, v in self.SQLITE_FIELD_MAP[table].items()}
+        if params.fields:
+            fields = list(
+                dict.fromkeys(i.strip() for i in params.fields.split(",") if i.strip())
+            )
+            if unknown := [i for i in fields if i not in columns]:
+                raise ValueError(_("字段不存在：{0}").format(", ".join(unknown)))
+        else:
+            fields = list(columns)
+        conditions, values = [], []
+        filters = self.SQLITE_FILTERS[table]
+        for name in (
+            "author_id",
+            "note_type",
+            "published_after",
+            "published_before",
+        ):
+            if (value := getattr(params, name)) is None:
+                continue
+            if name not in filters:
+                raise ValueError(_("数据表 {0} 不支持筛选条件 {1}").format(table, name))
+            if name in ("published_after", "published_before"):
+                value = self.__sqlite_time(name, value)
+            conditions.append(filters[name])
+            values.append(value)
+        if params.published_after or params.published_before:
+            # 发布时间未知的记录按文本比较会排在所有日期之后，按时间筛选时排除
+            conditions.append(self.SQLITE_DATED)
+        select = ", ".join(f'"{columns[i]}"' for i in fields)
+        # 按 rowid 分页，每页查询都从上一页最后一条记录之后开始读取
+        sql = (
+            f"SELECT rowid, {select} FROM {table} WHERE rowid > ?"
+            f"{''.join(f' AND {i}' for i in conditions)} "
+            "ORDER BY rowid LIMIT ?;"
+        )
+        return sql, fields, values
+
+    @staticmethod
+    def __sqlite_time(name: str, value: str) -> str:
+        """将时间筛选条件转换为数据库中发布时间的格式"""
+        for format_ in (Explore.time_format, "%Y-%m-%d"):
+            try:
+                return datetime.strptime(value, format_).strftime(Explore.time_format)
+            except ValueError:
+                continue
+        raise ValueError(
+            _("{0} 格式错误，应为 YYYY-MM-DD 或 YYYY-MM-DD_HH:MM:SS").format(name)
+        )
+
+    async def query_sqlite_data(
+        self,
+        table: str,
+        params: SQLiteQueryParams,
+        limit: int = None,
+    ):
+        """校验查询参数，返回字段列表与分批读取记录的异步生成器
+
+        生成器每次返回一批记录与最后一条记录的 rowid；limit 为 None 时读取全部符合条件的记录
+        """
+        recorder = {
+            "explore_data": self.data_recorder,
+            "explore_id": self.id_recorder,
+            "mapping_data": self.map_recorder,
+        }[table]
+        if not recorder.database:
+            raise RuntimeError(_("数据库未初始化"))
+        sql, fields, values = self.__build_sqlite_query(table, params)
+        await recorder.flush()
+        return fields, self.__iter_sqlite_rows(
+            recorder.database,
+            sql,
+            fields,
+            values,
+            params.cursor,
+            limit,
+        )
+
+    async def __iter_sqlite_rows(
+        self,
+        database,
+        sql: str,
+        fields: list[str],
+        values: list,
+        cursor: int,
+        limit: int | None,
+    ):
+        while limit is None or limit > 0:
+            size = self.SQLITE_BATCH if limit is None else min(limit, self.SQLITE_BATCH)
+            async with database.execute(sql, (cursor, *values, size)) as result:
+                rows = await result.fetchall()
+            if not rows:
+                return
+            cursor = rows[-1][0]
+            yield [dict(zip(fields, i[1:])) for i in rows], cursor
+            if len(rows) < size:
+                return
+            if limit is not None:
+                limit -= len(rows)
+
     # @staticmethod
     # def read_browser_cookie(value: str | int) -> str:
     #     return (
@@ -806,7 +1288,9 @@ class XHS:
             log_level=log_level,
         )
         server = Server(config)
-        await server.serve()
+        async with self.task_recorder:
+            await self.resume_download_tasks()
+            await server.serve()
 
     def setup_routes(
         self,
@@ -824,7 +1308,10 @@ class XHS:
         @server.get(
             "/xhs/sqlite/data",
             summary=_("获取 SQLite 存储数据"),
-            description=_("返回 SQLite 中已存储的作品记录、下载记录和映射数据"),
+            description=_(
+                "返回 SQLite 中已存储的作品记录、下载记录和映射数据；"
+                "数据量较大时请使用 /xhs/sqlite/{table} 分页查询"
+            ),
             tags=["API"],
             response_model=SQLiteDataResponse,
         )
@@ -843,6 +1330,85 @@ class XHS:
                 data=data,
             )
 
+        @server.get(
+            "/xhs/sqlite/{table}",
+            summary=_("分页查询 SQLite 存储数据"),
+            description=_(
+                dedent("""
+                **路径参数**:
+
+                - **table**: 数据表名称，`explore_data`、`explore_id` 或 `mapping_data`
+
+                **查询参数**:
+
+                - **cursor**: 上一页返回的 `next_cursor`；可选参数
+                - **limit**: 每页返回的记录数量，最大 1000；可选参数
+                - **fields**: 返回的字段，多个字段使用英文逗号分隔；可选参数
+                - **author_id**: 作者 ID；可选参数
+                - **note_type**: 作品类型；可选参数
+                - **published_after**: 发布时间不早于该时间，格式为 `YYYY-MM-DD` 或 `YYYY-MM-DD_HH:MM:SS`；可选参数
+                - **published_before**: 发布时间早于该时间，格式同上；可选参数
+
+                按发布时间筛选时不返回发布时间未知的记录
+                - **format**: `json` 分页返回，`ndjson` 或 `csv` 流式导出全部符合条件的记录；可选参数
+                """)
+            ),
+            tags=["API"],
+            response_model=SQLitePageResponse,
+        )
+        async def sqlite_table(
+            table: Annotated[
+                Literal["explore_data", "explore_id", "mapping_data"],
+                Path(description=_("数据表名称")),
+            ],
+            params: Annotated[SQLiteQueryParams, Query()],
+        ):
+            try:
+                fields, batches = await self.query_sqlite_data(
+                    table,
+                    params,
+                    None if params.format != "json" else params.limit,
+                )
+            except ValueError as error:
+                raise HTTPException(status_code=400, detail=str(error)) from error
+            except RuntimeError as error:
+                raise HTTPException(status_code=503, detail=str(error)) from error
+            if params.format == "ndjson":
+
+                async def ndjson():
+                    async for rows, __ in batches:
+                        yield "".join(f"{dumps(i, ensure_ascii=False)}\n" for i in rows)
+
+                return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+            if params.format == "csv":
+
+                async def csv():
+                    buffer = StringIO()
+                    file = writer(buffer)
+                    file.writerow(fields)
+                    yield buffer.getvalue()
+                    async for rows, __ in batches:
+                        buffer.seek(0)
+                        buffer.truncate()
+                        file.writerows(i.values() for i in rows)
+                        yield buffer.getvalue()
+
+                return StreamingResponse(
+                    csv(),
+                    media_type="text/csv; charset=utf-8",
+                    headers={
+                        "Content-Disposition": f'attachment; filename="{table}.csv"'
+                    },
+                )
+            data, cursor = [], None
+            async for rows, cursor in batches:
+                data.extend(rows)
+            return SQLitePageResponse(
+                message=_("获取 SQLite 数据成功"),
+                data=data,
+                next_cursor=cursor if len(data) == params.limit else None,
+            )
+
         @server.post(
             "/xhs/detail",
             summary=_("获取作品数据及下载地址"),
@@ -861,7 +1427,7 @@ class XHS:
             tags=["API"],
             response_model=ExtractData,
         )
-        async def handle(extract: ExtractParams):
+        async def handle(extract: ExtractParams, request: Request):
             data = None
             url = await self.extract_links(
                 extract.url,
@@ -869,19 +1435,72 @@ class XHS:
             if not url:
                 msg = _("提取小红书作品链接失败")
             else:
-                if data := await self.__deal_extract(
-                    url[0],
-                    extract.download,
-                    extract.index,
-                    not extract.skip,
-                    self._resolve_cookie(extract.cookie),
-                    self._resolve_proxy(extract.proxy),
-                ):
+                try:
+                    data = await self.__deal_extract_scheduled(
+                        "interactive",
+                        self.__client_id(request),
+                        url[0],
+                        extract.download,
+                        extract.index,
+                        not extract.skip,
+                        self._resolve_cookie(extract.cookie),
+                        self._resolve_proxy(extract.proxy),
+                    )
+                except QueueFullError as error:
+                    raise HTTPException(status_code=429, detail=str(error)) from error
+                if data:
                     msg = _("获取小红书作品数据成功")
                 else:
                     msg = _("获取小红书作品数据失败")
             return ExtractData(message=msg, params=extract, data=data)
 
+        @server.post(
+            "/xhs/detail/batch",
+            summary=_("批量获取作品数据及下载地址"),
+            description=_(
+                dedent("""
+                **参数**:
+
+                - **urls**: 小红书作品链接列表，每项对应一个作品，最多 100 项；必需参数
+                - **download**: 是否下载作品文件；可选参数
+                - **index**: 下载指定序号的图片文件，仅对图文作品生效；可选参数
+                - **cookie**: 请求数据时使用的 Cookie；可选参数
+                - **proxy**: 请求数据时使用的代理；可选参数
+                - **skip**: 是否跳过存在下载记录的作品；可选参数
+                - **concurrency**: 同时处理的作品数量，不能大于任务调度器的 `workers`；可选参数
+                - **format**: 结果格式，`ndjson` 或 `sse`；可选参数
+
+                每个作品处理完成后立即返回一条结果，包含 `index`、`url`、`message`、`data` 字段，
+                结果顺序为完成顺序，通过 `index` 对应请求中的链接
+                """)
+            ),
+            tags=["API"],
+            response_class=StreamingResponse,
+        )
+        async def handle_batch(extract: BatchExtractParams, request: Request):
+            self.__check_concurrency(extract.concurrency)
+
+            async def stream():
+                async for result in self.__deal_extract_stream(
+                    extract,
+                    self.__client_id(request),
+                ):
+                    result = dumps(result, ensure_ascii=False)
+                    yield (
+                        f"data: {result}\n\n"
+                        if extract.format == "sse"
+                        else f"{result}\n"
+                    )
+
+            return StreamingResponse(
+                stream(),
+                media_type=(
+                    "text/event-stream"
+                    if extract.format == "sse"
+                    else "application/x-ndjson"
+                ),
+            )
+
         @server.post(
             "/xhs/download/share",
             summary=_("下载指定作品链接文件"),
@@ -899,8 +1518,14 @@ class XHS:
             tags=["API"],
             response_model=DownloadShareResponse,
         )
-        async def download_share_api(extract: DownloadShareParams):
-            message, data, stats = await self.download_share(extract)
+        async def download_share_api(extract: DownloadShareParams, request: Request):
+            try:
+                message, data, stats = await self.download_share(
+                    extract,
+                    self.__client_id(request),
+                )
+            except QueueFullError as error:
+                raise HTTPException(status_code=429, detail=str(error)) from error
             return DownloadShareResponse(
                 message=message,
                 params=extract,
@@ -919,18 +1544,21 @@ class XHS:
                 - **cookie**: 本次请求使用的 Cookie；可选
                 - **proxy**: 本次请求使用的代理（http(s)/socks5）；可选
                 - **limit**: 最多处理作品数量；可选
+                - **concurrency**: 同时处理的作品数量，不能大于任务调度器的 `workers`；可选
                 """)
             ),
             tags=["API"],
             response_model=TaskAcceptedResponse,
         )
         async def download_user_posted(params: BatchDownloadParams):
+            self.__check_concurrency(params.concurrency)
             task_id = self.create_download_task(
                 mode="posted",
                 profile_url=params.profile_url,
                 cookie=params.cookie,
                 proxy=params.proxy,
                 limit=params.limit,
+                concurrency=params.concurrency,
                 video_only=False,
             )
             return TaskAcceptedResponse(
@@ -950,18 +1578,21 @@ class XHS:
                 - **cookie**: 本次请求使用的 Cookie；可选
                 - **proxy**: 本次请求使用的代理（http(s)/socks5）；可选
                 - **limit**: 最多处理作品数量；可选
+                - **concurrency**: 同时处理的作品数量，不能大于任务调度器的 `workers`；可选
                 """)
             ),
             tags=["API"],
             response_model=TaskAcceptedResponse,
         )
         async def download_me_liked(params: BatchDownloadParams):
+            self.__check_concurrency(params.concurrency)
             task_id = self.create_download_task(
                 mode="liked",
                 profile_url=params.profile_url,
                 cookie=params.cookie,
                 proxy=params.proxy,
                 limit=params.limit,
+                concurrency=params.concurrency,
                 video_only=True,
             )
             return TaskAcceptedResponse(
@@ -981,18 +1612,21 @@ class XHS:
                 - **cookie**: 本次请求使用的 Cookie；可选
                 - **proxy**: 本次请求使用的代理（http(s)/socks5）；可选
                 - **limit**: 最多处理作品数量；可选
+                - **concurrency**: 同时处理的作品数量，不能大于任务调度器的 `workers`；可选
                 """)
             ),
             tags=["API"],
             response_model=TaskAcceptedResponse,
         )
         async def download_me_saved(params: BatchDownloadParams):
+            self.__check_concurrency(params.concurrency)
             task_id = self.create_download_task(
                 mode="saved",
                 profile_url=params.profile_url,
                 cookie=params.cookie,
                 proxy=params.proxy,
                 limit=params.limit,
+                concurrency=params.concurrency,
                 video_only=True,
             )
             return TaskAcceptedResponse(
@@ -1001,6 +1635,48 @@ class XHS:
                 status_url=f"/xhs/tasks/{task_id}",
             )
 
+        @server.get(
+            "/metrics",
+            summary=_("获取运行指标"),
+            description=_("以 Prometheus 文本格式返回请求、下载、数据库与任务指标"),
+            tags=["API"],
+            response_class=PlainTextResponse,
+        )
+        async def metrics():
+            self.__collect_metrics()
+            return PlainTextResponse(
+                REGISTRY.render(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
+        @server.get(
+            "/xhs/queue",
+            summary=_("查询任务队列状态"),
+            description=_("返回各优先级任务队列的等待数量、拒绝数量与等待时间"),
+            tags=["API"],
+        )
+        async def get_queue_metrics():
+            return self.jobs.metrics()
+
+        @server.get(
+            "/xhs/tasks/events",
+            summary=_("订阅全部批量下载任务进度"),
+            description=_(
+                dedent("""
+                以 Server-Sent Events 格式推送全部任务的事件，事件格式与单个任务的事件流相同，
+                连接不会因任务结束而关闭
+                """)
+            ),
+            tags=["API"],
+            response_class=StreamingResponse,
+        )
+        async def get_tasks_events():
+            return StreamingResponse(
+                self.__task_events(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
+            )
+
         @server.get(
             "/xhs/tasks/{task_id}",
             summary=_("查询批量下载任务状态"),
@@ -1019,15 +1695,33 @@ class XHS:
         ):
             if not (task := self.task_manager.get(task_id)):
                 raise HTTPException(status_code=404, detail=_("任务不存在"))
-            return TaskStatusResponse(
-                task_id=task["task_id"],
-                mode=task["mode"],
-                status=task["status"],
-                started_at=task["started_at"],
-                finished_at=task["finished_at"],
-                progress=DownloadStatistics(**task["progress"]),
-                summary=DownloadStatistics(**task["summary"]),
-                errors=task["errors"],
+            return self.__task_status(task)
+
+        @server.get(
+            "/xhs/tasks/{task_id}/events",
+            summary=_("订阅批量下载任务进度"),
+            description=_(
+                dedent("""
+                **路径参数**:
+
+                - **task_id**: 创建批量下载任务接口返回的任务 ID
+
+                以 Server-Sent Events 格式推送任务事件：连接后发送 `snapshot` 事件，
+                之后发送 `status`、`progress`（仅包含变化的计数）与 `error` 事件，任务结束后关闭连接
+                """)
+            ),
+            tags=["API"],
+            response_class=StreamingResponse,
+        )
+        async def get_task_events(
+            task_id: Annotated[str, Path(description=_("批量下载任务 ID"))],
+        ):
+            if not self.task_manager.get(task_id):
+                raise HTTPException(status_code=404, detail=_("任务不存在"))
+            return StreamingResponse(
+                self.__task_events(task_id),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache"},
             )
 
     async def run_mcp_server(
@@ -1202,13 +1896,19 @@ class XHS:
             url,
         )
         if not url:
-            msg = _("提取小红书作品链接失败")
-        elif data := await self.__deal_extract(
-            url[0],
-            download,
-            index,
-            True,
-        ):
+            return _("提取小红书作品链接失败"), data
+        try:
+            data = await self.__deal_extract_scheduled(
+                "interactive",
+                "mcp",
+                url[0],
+                download,
+                index,
+                True,
+            )
+        except QueueFullError as error:
+            return str(error), data
+        if data:
             msg = _("获取小红书作品数据成功")
         else:
             msg = _("获取小红书作品数据失败")
@@ -1289,6 +1989,7 @@ class XHS:
     async def download_share(
         self,
         extract: DownloadShareParams,
+        client: str = "local",
     ) -> tuple[str, dict | None, dict[str, int]]:
         data = None
         stats = SimpleNamespace(
@@ -1302,7 +2003,9 @@ class XHS:
         )
         if not url:
             msg = _("提取小红书作品链接失败")
-        elif data := await self.__deal_extract(
+        elif data := await self.__deal_extract_scheduled(
+            "interactive",
+            client,
             url[0],
             True,
             extract.index,
@@ -1324,20 +2027,82 @@ class XHS:
         proxy: str | None,
         limit: int | None,
         video_only: bool,
+        concurrency: int | None = None,
     ) -> str:
-        task_id = self.task_manager.create(mode)
+        # Cookie 与代理不写入数据库，恢复任务时使用配置文件中的 Cookie 与代理；
+        # 仅记录 Cookie 对应账号的标识，用于确认恢复任务时账号未改变
+        params = {
+            "profile_url": profile_url,
+            "limit": limit,
+            "video_only": video_only,
+            "concurrency": concurrency or self.manager.concurrency,
+            "account": self.__account_fingerprint(self._resolve_cookie(cookie)),
+        }
+        task_id = self.task_manager.create(mode, params)
+        self.__start_download_task(task_id, mode, params, cookie, proxy)
+        return task_id
+
+    def __start_download_task(
+        self,
+        task_id: str,
+        mode: str,
+        params: dict,
+        cookie: str = None,
+        proxy: str = None,
+    ):
         create_task(
             self._run_download_task(
                 task_id=task_id,
                 mode=mode,
-                profile_url=profile_url,
+                profile_url=params["profile_url"],
                 cookie=self._resolve_cookie(cookie),
                 proxy=self._resolve_proxy(proxy),
-                limit=limit,
-                video_only=video_only,
+                limit=params["limit"],
+                video_only=params["video_only"],
+                concurrency=params["concurrency"],
             )
         )
-        return task_id
+
+    async def resume_download_tasks(self):
+        """继续执行程序退出前未完成的批量下载任务"""
+        account = self.__account_fingerprint(None)
+        for task in await self.task_manager.load(self.task_recorder):
+            if (
+                task["mode"] in self.ACCOUNT_MODES
+                and task["params"].get("account") != account
+            ):
+                # 不使用其他账号的 Cookie 继续下载本人点赞或收藏的作品
+                progress = task["progress"]
+                self.task_manager.fail(
+                    task["task_id"],
+                    _(
+                        "当前 Cookie 对应的账号与创建任务时不一致，"
+                        "请使用原账号的 Cookie 重新创建任务"
+                    ),
+                    all_count=progress["all"],
+                    success=progress["success"],
+                    fail_count=progress["fail"],
+                    skip=progress["skip"],
+                    filtered=progress["filtered"],
+                )
+                continue
+            self.logging(_("继续执行批量下载任务：{0}").format(task["task_id"]))
+            self.__start_download_task(task["task_id"], task["mode"], task["params"])
+
+    def __account_fingerprint(self, cookie: str | None) -> str | None:
+        """根据 Cookie 中的 web_session 计算账号标识，未传入时使用配置文件中的 Cookie"""
+        if cookie:
+            session = (match := self.WEB_SESSION.search(cookie)) and match[1]
+        else:
+            session = next(
+                (
+                    i.value
+                    for i in self.manager.request_client.cookies.jar
+                    if i.name == "web_session"
+                ),
+                None,
+            )
+        return sha256(session.encode()).hexdigest()[:16] if session else None
 
     async def _run_download_task(
         self,
@@ -1348,14 +2113,20 @@ class XHS:
         proxy: str | None,
         limit: int | None,
         video_only: bool,
+        concurrency: int = 1,
     ):
+        await self.task_manager.expire()
+        # 恢复任务时跳过已处理的作品，并沿用已记录的下载统计
+        task = self.task_manager.get(task_id)
+        processed = await self.task_manager.processed(task_id)
         statistics = SimpleNamespace(
-            all=0,
-            success=0,
+            all=len(processed),
+            success=task["progress"]["success"],
+            # 处理失败的作品未记录为已处理，恢复任务时会重新处理
             fail=0,
-            skip=0,
+            skip=task["progress"]["skip"],
         )
-        filtered = 0
+        filtered = task["progress"]["filtered"]
         try:
             if not (user_id := await self.resolve_profile_id(profile_url, proxy)):
                 self.task_manager.fail(task_id, _("主页链接格式错误"))
@@ -1366,55 +2137,90 @@ class XHS:
                 cookie,
                 proxy,
             )
-            links = await loader.run(
-                mode=mode,
-                user_id=user_id,
-                limit=limit,
-            )
-            statistics.all = len(links)
-            self.task_manager.mark_running(task_id, len(links))
-            if not links:
-                self.task_manager.complete(
-                    task_id,
-                    all_count=0,
-                    success=0,
-                    fail=0,
-                    skip=0,
-                    filtered=0,
-                )
-                return
+            # 获取下一页作品链接的同时处理已获取的作品
+            queue: Queue[tuple[list, str, str] | None] = Queue(self.TASK_QUEUE_SIZE)
+            # 已获取的分页位置与该页未处理完成的作品数量，按获取顺序排列
+            pages: deque[list] = deque()
+            remaining = limit - len(processed) if limit else None
 
-            for link in links:
+            async def produce():
                 try:
-                    is_filtered, error = await self._batch_deal_extract(
-                        link,
-                        cookie,
-                        proxy,
-                        video_only,
+                    if remaining is not None and remaining <= 0:
+                        return
+                    async for cursor, page in loader.pages(
+                        mode=mode,
+                        user_id=user_id,
+                        limit=remaining,
+                        cursor=task["cursor"],
+                        exclude=processed,
+                    ):
+                        statistics.all += len(page)
+                        self.task_manager.mark_running(task_id, statistics.all)
+                        pages.append(entry := [cursor, len(page)])
+                        for note_id, item in page:
+                            await queue.put((entry, note_id, item))
+                finally:
+                    # 每个消费者各自接收一个结束标记；任务被取消时消费者已退出，无需发送
+                    if not current_task().cancelling():
+                        for __ in range(concurrency):
+                            await queue.put(None)
+
+            async def consume():
+                nonlocal filtered
+                while (item := await queue.get()) is not None:
+                    entry, note_id, link = item
+                    count = SimpleNamespace(all=0, success=0, fail=0, skip=0)
+                    try:
+                        async with self.jobs.slot("batch", task_id, bounded=False):
+                            is_filtered, error = await self._batch_deal_extract(
+                                link,
+                                cookie,
+                                proxy,
+                                video_only,
+                                count,
+                            )
+                        if is_filtered:
+                            filtered += 1
+                        if error:
+                            self.task_manager.add_error(task_id, error)
+                    except Exception as error:
+                        count.fail += 1
+                        self.task_manager.add_error(
+                            task_id,
+                            _("{0} 下载失败：{1}").format(link, repr(error)),
+                        )
+                    for key in ("success", "fail", "skip"):
+                        setattr(
+                            statistics,
+                            key,
+                            getattr(statistics, key) + getattr(count, key),
+                        )
+                    # 处理失败的作品不记录为已处理，所在分页保留为恢复任务时的起点
+                    if not count.fail:
+                        entry[1] -= 1
+                        # 从最早一个存在未处理作品的分页继续，该页已处理的作品会被跳过
+                        while len(pages) > 1 and not pages[0][1]:
+                            pages.popleft()
+                        self.task_manager.checkpoint(task_id, note_id, pages[0][0])
+                    progress = self._stats_to_dict(
                         statistics,
+                        filtered,
                     )
-                    if is_filtered:
-                        filtered += 1
-                    if error:
-                        self.task_manager.add_error(task_id, error)
-                except Exception as error:
-                    statistics.fail += 1
-                    self.task_manager.add_error(
+                    self.task_manager.update_progress(
                         task_id,
-                        _("{0} 下载失败：{1}").format(link, repr(error)),
+                        all_count=progress["all"],
+                        success=progress["success"],
+                        fail=progress["fail"],
+                        skip=progress["skip"],
+                        filtered=progress["filtered"],
                     )
-                progress = self._stats_to_dict(
-                    statistics,
-                    filtered,
-                )
-                self.task_manager.update_progress(
-                    task_id,
-                    all_count=progress["all"],
-                    success=progress["success"],
-                    fail=progress["fail"],
-                    skip=progress["skip"],
-                    filtered=progress["filtered"],
-                )
+
+            producer = create_task(produce())
+            try:
+                await gather(*(consume() for __ in range(concurrency)))
+                await producer
+            finally:
+                producer.cancel()
 
             summary = self._stats_to_dict(
                 statistics,
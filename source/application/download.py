@@ -1,18 +1,23 @@
-from asyncio import Semaphore, gather
+from asyncio import gather
+from collections import deque
+from json import dump, load
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from aiofiles import open
 from httpx import HTTPError
 
-from ..expansion import CacheError
+from ..expansion import CacheError, RequestError
 
 # from ..module import WARNING
 from ..module import (
     ERROR,
     FILE_SIGNATURES,
     FILE_SIGNATURES_LENGTH,
-    MAX_WORKERS,
+    DirectoryListing,
+    FileWriter,
+    RateLimiter,
+    RetryPolicy,
     logging,
     # sleep_time,
 )
@@ -22,13 +27,12 @@ from ..translation import _
 if TYPE_CHECKING:
     from httpx import AsyncClient
 
-    from ..module import Manager
+    from ..module import Manager, MediaCache
 
 __all__ = ["Download"]
 
 
 class Download:
-    SEMAPHORE = Semaphore(MAX_WORKERS)
     CONTENT_TYPE_MAP = {
         "image/png": "png",
         "image/jpeg": "jpeg",
@@ -42,15 +46,21 @@ class Download:
     def __init__(
         self,
         manager: "Manager",
+        media_cache: "MediaCache",
     ):
         self.manager = manager
+        self.media_cache = media_cache
+        self.listing = DirectoryListing()
         self.print = manager.print
         self.folder = manager.folder
         self.temp = manager.temp
         self.chunk = manager.chunk
         self.client: "AsyncClient" = manager.download_client
+        self.scheduler = manager.download_scheduler
         self.headers = manager.blank_headers
         self.retry = manager.retry
+        self.retry_policy = manager.retry_policy
+        self.breaker = manager.breaker
         self.folder_mode = manager.folder_mode
         self.video_format = "mp4"
         self.live_format = "mp4"
@@ -67,6 +77,7 @@ class Download:
         self.live_download = manager.live_download
         self.author_archive = manager.author_archive
         self.write_mtime = manager.write_mtime
+        self.segment = manager.segment_download
 
     async def run(
         self,
@@ -79,6 +90,7 @@ class Download:
         mtime: int,
     ) -> tuple[Path, list[bool], list[str]]:
         path = self.__generate_path(nickname, filename)
+        await self.listing.load(path)
         if type_ == _("视频"):
             tasks = self.__ready_download_video(
                 urls,
@@ -105,8 +117,9 @@ class Download:
                 name,
                 format_,
                 mtime,
+                kind,
             )
-            for url, name, format_ in tasks
+            for url, name, format_, kind in tasks
         ]
         tasks = await gather(*tasks)
         return (
@@ -139,7 +152,7 @@ class Download:
             f"{name}.{self.video_format}",
         ):
             return []
-        return [(urls[0], name, self.video_format)]
+        return [(urls[0], name, self.video_format, "video")]
 
     def __ready_download_image(
         self,
@@ -164,7 +177,7 @@ class Download:
                 )
                 for s in self.image_format_list
             ):
-                tasks.append([j[0], file, self.image_format])
+                tasks.append([j[0], file, self.image_format, "image"])
             if (
                 not self.live_download
                 or not j[1]
@@ -174,7 +187,7 @@ class Download:
                 )
             ):
                 continue
-            tasks.append([j[1], file, self.live_format])
+            tasks.append([j[1], file, self.live_format, "live"])
         return tasks
 
     def __check_exists_glob(
@@ -192,7 +205,7 @@ class Download:
         path: Path,
         name: str,
     ) -> bool:
-        if path.joinpath(name).exists():
+        if self.listing.exists(path, name):
             logging(self.print, _("{0} 文件已存在，跳过下载").format(name))
             return True
         return False
@@ -205,44 +218,80 @@ class Download:
         name: str,
         format_: str,
         mtime: int,
+        kind: str,
     ) -> tuple[bool, Path | None]:
-        async with self.SEMAPHORE:
+        if real := await self.media_cache.fetch(url, path, name, mtime):
+            self.listing.add(real)
+            return True, real
+        if not self.breaker.allow(url):
+            logging(
+                self.print,
+                _("{0} 连续请求失败，暂停下载 {1}").format(RateLimiter.host(url), name),
+                ERROR,
+            )
+            raise RequestError(url, RequestError.CIRCUIT_OPEN, (False, None))
+        async with self.scheduler.slot(kind, url) as slot:
             headers = self.headers.copy()
             temp = self.temp.joinpath(f"{name}.{format_}")
-            self.__update_headers_range(
-                headers,
-                temp,
-            )
             try:
-                async with self.client.stream(
-                    "GET",
-                    url,
-                    headers=headers,
-                ) as response:
-                    # await sleep_time()
-                    if response.status_code == 416:
-                        raise CacheError(
-                            _("文件 {0} 缓存异常，重新下载").format(temp.name),
-                        )
-                    response.raise_for_status()
-                    # self.__create_progress(
-                    #     bar,
-                    #     int(
-                    #         response.headers.get(
-                    #             'content-length', 0)) or None,
-                    # )
-                    async with open(temp, "ab") as f:
-                        async for chunk in response.aiter_bytes(self.chunk):
-                            await f.write(chunk)
-                            # self.__update_progress(bar, len(chunk))
+                if kind == "video" and (resume := self.__load_segments(temp)):
+                    # 继续未完成的分段下载，文件大小记录在分段信息中
+                    signature = await self.__download_segments(
+                        url,
+                        temp,
+                        slot,
+                        *resume,
+                    )
+                else:
+                    self.__update_headers_range(
+                        headers,
+                        temp,
+                    )
+                    async with self.client.stream(
+                        "GET",
+                        url,
+                        headers=headers,
+                    ) as response:
+                        # await sleep_time()
+                        if response.status_code == 416:
+                            raise CacheError(
+                                _("文件 {0} 缓存异常，重新下载").format(temp.name),
+                            )
+                        response.raise_for_status()
+                        # self.__create_progress(
+                        #     bar,
+                        #     int(
+                        #         response.headers.get(
+                        #             'content-length', 0)) or None,
+                        # )
+                        if kind == "video" and (
+                            length := self.__segment_length(response, temp)
+                        ):
+                            # 首个请求的响应用于下载第一段，无需额外发送 HEAD 请求获取文件大小
+                            signature = await self.__download_segments(
+                                url,
+                                temp,
+                                slot,
+                                length,
+                                None,
+                                response,
+                            )
+                        else:
+                            async with FileWriter(temp, "ab") as f:
+                                async for chunk in response.aiter_bytes(self.chunk):
+                                    await f.write(chunk)
+                                    slot.size += len(chunk)
+                                    # self.__update_progress(bar, len(chunk))
+                            signature = f.signature
                 real = await self.__suffix_with_file(
                     temp,
                     path,
                     name,
                     # suffix,
                     format_,
+                    signature,
                 )
-                self.manager.move(
+                await self.manager.move(
                     temp,
                     real,
                     mtime,
@@ -250,9 +299,17 @@ class Download:
                 )
                 # self.__create_progress(bar, None)
                 logging(self.print, _("文件 {0} 下载成功").format(real.name))
+                self.listing.add(real)
+                await self.media_cache.save(url, real)
+                self.breaker.success(url)
+                slot.result = True
                 return True, real
             except HTTPError as error:
                 # self.__create_progress(bar, None)
+                error_kind = RetryPolicy.classify(error)
+                self.breaker.failure(url, error_kind)
+                # 永久性错误与网络状况无关，不影响并发数调整
+                slot.result = None if error_kind == RequestError.PERMANENT else False
                 logging(
                     self.print,
                     _("网络异常，{0} 下载失败，错误信息: {1}").format(
@@ -260,15 +317,21 @@ class Download:
                     ),
                     ERROR,
                 )
-                return False, None
+                raise RequestError(repr(error), error_kind, (False, None)) from error
             except CacheError as error:
                 self.manager.delete(temp)
+                self.manager.delete(self.__segment_record(temp))
                 logging(
                     self.print,
                     str(error),
                     ERROR,
                 )
-                return False, None
+                raise RequestError(
+                    str(error), RequestError.TRANSIENT, (False, None)
+                ) from error
+            finally:
+                # 缓存异常或下载被取消时结束探测请求
+                self.breaker.release(url)
 
     @staticmethod
     def __create_progress(
@@ -293,8 +356,7 @@ class Download:
         url: str,
         headers: dict[str, str],
         suffix: str,
-    ) -> tuple[int, str]:
-        """未使用"""
+    ) -> tuple[int, str, bool]:
         response = await self.client.head(
             url,
             headers=headers,
@@ -303,7 +365,171 @@ class Download:
         response.raise_for_status()
         suffix = self.__extract_type(response.headers.get("Content-Type")) or suffix
         length = response.headers.get("Content-Length", 0)
-        return int(length), suffix
+        ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+        return int(length), suffix, ranges
+
+    async def __download_segments(
+        self,
+        url: str,
+        temp: Path,
+        slot,
+        length: int,
+        segments: list[list[int]] | None,
+        response=None,
+    ) -> bytes:
+        """分段并发下载文件，返回文件开头的数据
+
+        :param segments: 未完成的分段信息，None 表示开始新的分段下载
+        :param response: 已发送的文件请求，用于下载第一段
+        """
+        record = self.__segment_record(temp)
+        if segments is None:
+            segments = self.__split_segments(length, self.segment["segments"])
+            async with open(temp, "wb") as f:
+                await f.truncate(length)
+            self.__save_segments(record, length, segments)
+        pending = deque(i for i in segments if i[0] + i[2] <= i[1])
+
+        async def worker(response_=None):
+            while pending:
+                await self.__download_segment(
+                    url,
+                    temp,
+                    length,
+                    pending.popleft(),
+                    slot,
+                    response_,
+                )
+                response_ = None
+
+        try:
+            # 分段连接同样受单个域名并发数限制
+            async with self.scheduler.connections(slot, len(pending)) as count:
+                results = await gather(
+                    worker(response),
+                    *(worker() for __ in range(count - 1)),
+                    return_exceptions=True,
+                )
+        finally:
+            self.__save_segments(record, length, segments)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        if (
+            any(start + done <= end for start, end, done in segments)
+            or temp.stat().st_size != length
+        ):
+            raise CacheError(
+                _("文件 {0} 缓存异常，重新下载").format(temp.name),
+            )
+        self.manager.delete(record)
+        async with open(temp, "rb") as f:
+            return await f.read(FILE_SIGNATURES_LENGTH)
+
+    def __segment_length(self, response, temp: Path) -> int:
+        """根据首个请求的响应判断是否分段下载，返回文件大小；返回 0 表示使用单连接下载"""
+        if not self.segment["enable"] or temp.is_file():
+            # 已存在单连接下载的缓存文件时继续断点续传
+            return 0
+        if response.status_code != 206:
+            return 0
+        range_, __, total = response.headers.get("Content-Range", "").rpartition("/")
+        if not range_.startswith("bytes 0-") or not total.isdigit():
+            return 0
+        length = int(total)
+        return length if length >= self.segment["min_size"] else 0
+
+    async def __download_segment(
+        self,
+        url: str,
+        temp: Path,
+        length: int,
+        segment: list[int],
+        slot,
+        response=None,
+    ) -> None:
+        start, end, done = segment
+        if (position := start + done) > end:
+            return
+        if response:
+            await self.__write_segment(response, temp, segment, slot)
+            return
+        async with self.client.stream(
+            "GET",
+            url,
+            headers=self.headers | {"Range": f"bytes={position}-{end}"},
+        ) as response:
+            response.raise_for_status()
+            content_range = response.headers.get("Content-Range", "")
+            if (
+                response.status_code != 206
+                or not content_range.startswith(f"bytes {position}-")
+                or not content_range.endswith(f"/{length}")
+            ):
+                raise CacheError(
+                    _("文件 {0} 缓存异常，重新下载").format(temp.name),
+                )
+            await self.__write_segment(response, temp, segment, slot)
+
+    async def __write_segment(
+        self,
+        response,
+        temp: Path,
+        segment: list[int],
+        slot,
+    ) -> None:
+        start, end = segment[0], segment[1]
+        async with FileWriter(temp, "r+b", start + segment[2]) as f:
+            async for chunk in response.aiter_bytes(self.chunk):
+                chunk = chunk[: end + 1 - start - segment[2]]
+                await f.write(chunk)
+                segment[2] += len(chunk)
+                slot.size += len(chunk)
+                if start + segment[2] > end:
+                    # 响应包含后续分段的数据时，读取到分段结尾即停止
+                    break
+
+    @staticmethod
+    def __split_segments(length: int, count: int) -> list[list[int]]:
+        size = -(-length // count)
+        return [
+            [start, min(start + size, length) - 1, 0]
+            for start in range(0, length, size)
+        ]
+
+    @staticmethod
+    def __segment_record(temp: Path) -> Path:
+        return temp.with_name(f"{temp.name}.segments")
+
+    def __load_segments(self, temp: Path) -> tuple[int, list[list[int]]] | None:
+        """读取未完成的分段下载记录，返回文件大小与分段信息；记录无效时删除缓存文件重新下载"""
+        record = self.__segment_record(temp)
+        if not record.is_file():
+            return None
+        try:
+            with record.open("r", encoding="utf-8") as f:
+                data = load(f)
+        except (OSError, ValueError):
+            data = {}
+        if (
+            isinstance(length := data.get("length"), int)
+            and temp.is_file()
+            and temp.stat().st_size == length
+            and data.get("segments")
+        ):
+            return length, data["segments"]
+        self.manager.delete(temp)
+        self.manager.delete(record)
+        return None
+
+    @staticmethod
+    def __save_segments(
+        record: Path,
+        length: int,
+        segments: list[list[int]],
+    ) -> None:
+        with record.open("w", encoding="utf-8") as f:
+            dump({"length": length, "segments": segments}, f)
 
     @staticmethod
     def __get_resume_byte_position(file: Path) -> int:
@@ -323,10 +549,12 @@ class Download:
         path: Path,
         name: str,
         default_suffix: str,
+        file_start: bytes = None,
     ) -> Path:
         try:
-            async with open(temp, "rb") as f:
-                file_start = await f.read(FILE_SIGNATURES_LENGTH)
+            if file_start is None:
+                async with open(temp, "rb") as f:
+                    file_start = await f.read(FILE_SIGNATURES_LENGTH)
             for offset, signature, suffix in FILE_SIGNATURES:
                 if file_start[offset : offset + len(signature)] == signature:
                     return path.joinpath(f"{name}.{suffix}")
@@ -1,9 +1,18 @@
+from time import perf_counter
 from typing import TYPE_CHECKING
 
-from httpx import HTTPError
-from httpx import get
+from httpx import HTTPError, HTTPStatusError
 
-from ..module import ERROR, Manager, logging, retry, sleep_time
+from ..expansion import RequestError
+from ..module import (
+    ERROR,
+    REQUEST_DURATION,
+    Manager,
+    RateLimiter,
+    RetryPolicy,
+    logging,
+    retry,
+)
 from ..translation import _
 
 if TYPE_CHECKING:
@@ -19,7 +28,11 @@ class Html:
     ):
         self.print = manager.print
         self.retry = manager.retry
+        self.retry_policy = manager.retry_policy
+        self.breaker = manager.breaker
         self.client = manager.request_client
+        self.proxy_clients = manager.proxy_clients
+        self.limiter = manager.limiter
         self.headers = manager.blank_headers
         self.timeout = manager.timeout
 
@@ -37,6 +50,16 @@ class Html:
         headers = self.update_cookie(
             cookie,
         )
+        if not self.breaker.allow(url):
+            logging(
+                self.print,
+                _("{0} 连续请求失败，暂停请求该域名").format(RateLimiter.host(url)),
+                ERROR,
+            )
+            raise RequestError(url, RequestError.CIRCUIT_OPEN, "")
+        await self.limiter.acquire(url)
+        start = perf_counter()
+        status = None
         try:
             match bool(proxy):
                 case False:
@@ -45,9 +68,6 @@ class Html:
                         headers,
                         **kwargs,
                     )
-                    await sleep_time()
-                    response.raise_for_status()
-                    return response.text if content else str(response.url)
                 case True:
                     response = await self.__request_url_get_proxy(
                         url,
@@ -55,25 +75,39 @@ class Html:
                         proxy,
                         **kwargs,
                     )
-                    await sleep_time()
-                    response.raise_for_status()
-                    return response.text if content else str(response.url)
                 case _:
                     raise ValueError
+            status = response.status_code
+            await self.limiter.feedback(url, status)
+            response.raise_for_status()
+            self.breaker.success(url)
+            return response.text if content else str(response.url)
         except HTTPError as error:
+            if not isinstance(error, HTTPStatusError):
+                await self.limiter.feedback(url)
+            kind = RetryPolicy.classify(error)
+            self.breaker.failure(url, kind)
             logging(
                 self.print,
                 _("网络异常，{0} 请求失败: {1}").format(url, repr(error)),
                 ERROR,
             )
-            return ""
+            raise RequestError(repr(error), kind, "") from error
         except ValueError as error:
             logging(
                 self.print,
                 _("请求参数异常，{0} 请求失败: {1}").format(url, repr(error)),
                 ERROR,
             )
-            return ""
+            raise RequestError(repr(error), RequestError.PERMANENT, "") from error
+        finally:
+            # 请求被取消或参数异常时结束探测请求
+            self.breaker.release(url)
+            REQUEST_DURATION.observe(
+                perf_counter() - start,
+                host=RateLimiter.host(url),
+                status=status or "error",
+            )
 
     @staticmethod
     def format_url(url: str) -> str:
@@ -104,15 +138,12 @@ class Html:
         proxy: str,
         **kwargs,
     ):
-        return await self.client.head(
-            url,
-            headers=headers,
-            proxy=proxy,
-            follow_redirects=True,
-            verify=False,
-            timeout=self.timeout,
-            **kwargs,
-        )
+        async with self.proxy_clients.client(proxy) as client:
+            return await client.head(
+                url,
+                headers=headers,
+                **kwargs,
+            )
 
     async def __request_url_get(
         self,
@@ -133,12 +164,9 @@ class Html:
         proxy: str,
         **kwargs,
     ):
-        return get(
-            url,
-            headers=headers,
-            proxy=proxy,
-            follow_redirects=True,
-            verify=False,
-            timeout=self.timeout,
-            **kwargs,
-        )
+        async with self.proxy_clients.client(proxy) as client:
+            return await client.get(
+                url,
+                headers=headers,
+                **kwargs,
+            )
@@ -1,6 +1,10 @@
-from typing import TYPE_CHECKING, Any
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, AsyncIterator
 
-from ..module import retry, sleep_time
+from httpx import HTTPError, HTTPStatusError
+
+from ..expansion import RequestError
+from ..module import REQUEST_DURATION, RateLimiter, RetryPolicy, retry
 
 try:
     from xhshow import Xhshow
@@ -30,8 +34,12 @@ class UserPosted:
     ):
         self.headers = manager.blank_headers.copy()
         self.client = manager.request_client
+        self.proxy_clients = manager.proxy_clients
+        self.limiter = manager.limiter
         self.cookies = self.get_cookie(cookies)
         self.retry = manager.retry
+        self.retry_policy = manager.retry_policy
+        self.breaker = manager.breaker
         self.timeout = manager.timeout
         self.proxy = proxy
         self._encipher = None
@@ -71,11 +79,29 @@ class UserPosted:
         user_id: str,
         limit: int | None = None,
     ) -> list[str]:
+        urls: list[str] = []
+        async for __, page in self.pages(mode, user_id, limit):
+            urls.extend(url for __, url in page)
+        return urls
+
+    async def pages(
+        self,
+        mode: str,
+        user_id: str,
+        limit: int | None = None,
+        cursor: str = "",
+        exclude: set[str] = None,
+    ) -> AsyncIterator[tuple[str, list[tuple[str, str]]]]:
+        """逐页获取作品链接，每获取一页返回该页的分页位置与未重复的作品 ID 及链接
+
+        :param cursor: 开始请求的分页位置
+        :param exclude: 需要跳过的作品 ID，不计入 limit
+        """
         if mode not in self.ENDPOINTS:
             raise ValueError(f"Unsupported mode: {mode}")
-        cursor = ""
-        urls: list[str] = []
+        count = 0
         cache: set[str] = set()
+        exclude = exclude or set()
         while True:
             url = self.BASE + self.ENDPOINTS[mode]
             params = self._build_params(mode, user_id, cursor)
@@ -83,8 +109,9 @@ class UserPosted:
             notes = self._extract_notes(data)
             if not notes:
                 break
+            urls: list[tuple[str, str]] = []
             for note_id, token in notes:
-                if not note_id:
+                if not note_id or note_id in exclude:
                     continue
                 if token:
                     item = (
@@ -95,13 +122,16 @@ class UserPosted:
                     item = f"https://www.xiaohongshu.com/discovery/item/{note_id}"
                 if item not in cache:
                     cache.add(item)
-                    urls.append(item)
-                if limit and len(urls) >= limit:
-                    return urls[:limit]
+                    urls.append((note_id, item))
+                if limit and count + len(urls) >= limit:
+                    yield cursor, urls[: limit - count]
+                    return
+            count += len(urls)
+            if urls:
+                yield cursor, urls
             cursor, has_more = self._extract_paging(data, cursor)
             if not has_more:
                 break
-        return urls
 
     @staticmethod
     def _build_params(mode: str, user_id: str, cursor: str) -> dict:
@@ -117,16 +147,51 @@ class UserPosted:
 
     @retry
     async def get_data(self, url: str, params: dict):
+        if not self.breaker.allow(url):
+            raise RequestError(
+                f"Circuit open: {RateLimiter.host(url)}",
+                RequestError.CIRCUIT_OPEN,
+            )
+        await self.limiter.acquire(url)
+        # 签名包含时间戳，等待令牌后再生成
         headers = self.get_headers(url, params)
-        response = await self.client.get(
-            url,
-            params=params,
-            headers=headers,
-            follow_redirects=True,
-            timeout=self.timeout,
-        )
-        await sleep_time()
-        response.raise_for_status()
+        start = perf_counter()
+        status = None
+        try:
+            if self.proxy:
+                async with self.proxy_clients.client(self.proxy) as client:
+                    response = await client.get(
+                        url,
+                        params=params,
+                        headers=headers,
+                    )
+            else:
+                response = await self.client.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    follow_redirects=True,
+                    timeout=self.timeout,
+                )
+            status = response.status_code
+            await self.limiter.feedback(url, status)
+            response.raise_for_status()
+        except HTTPError as error:
+            if not isinstance(error, HTTPStatusError):
+                # 网络异常同样需要降低请求速率
+                await self.limiter.feedback(url)
+            kind = RetryPolicy.classify(error)
+            self.breaker.failure(url, kind)
+            raise RequestError(repr(error), kind) from error
+        finally:
+            # 请求被取消时结束探测请求
+            self.breaker.release(url)
+            REQUEST_DURATION.observe(
+                perf_counter() - start,
+                host=RateLimiter.host(url),
+                status=status or "error",
+            )
+        self.breaker.success(url)
         return response.json()
 
     def get_headers(self, url: str, params: dict):
@@ -1,7 +1,8 @@
 # from .browser import BrowserCookie
+from .bloom import BloomFilter
 from .cleaner import Cleaner
 from .converter import Converter
-from .error import CacheError
+from .error import CacheError, QueueFullError, RequestError
 from .file_folder import file_switch
 from .file_folder import remove_empty_directories
 from .namespace import Namespace
@@ -0,0 +1,45 @@
+from hashlib import blake2b
+from math import ceil, log
+
+__all__ = ["BloomFilter"]
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        布隆过滤器，判断结果为 False 时元素一定不存在，为 True 时元素可能存在
+        :param capacity: 预计元素数量
+        :param error_rate: 期望误判率
+        """
+        capacity = max(capacity, 1)
+        self.size = ceil(-capacity * log(error_rate) / (log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def __positions(self, item: str) -> list[int]:
+        value = int.from_bytes(blake2b(item.encode(), digest_size=16).digest())
+        a, b = value >> 64, value & 0xFFFFFFFFFFFFFFFF | 1
+        size = self.size
+        return [(a + i * b) % size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        bits = self.bits
+        for i in self.__positions(item):
+            bits[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for i in self.__positions(item):
+            if not bits[i >> 3] & (1 << (i & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def memory(self) -> int:
+        """占用内存，单位：字节"""
+        return len(self.bits)
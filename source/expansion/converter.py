@@ -1,3 +1,5 @@
+from json import loads
+from re import compile
 from typing import Union
 
 from lxml.etree import HTML
@@ -8,6 +10,9 @@ __all__ = ["Converter"]
 
 class Converter:
     INITIAL_STATE = "//script/text()"
+    SCRIPT_PREFIX = "window.__INITIAL_STATE__"
+    # 匹配 JSON 字符串或字符串之外的 JavaScript 字面量
+    JS_LITERAL = compile(r'("[^"\\]*(?:\\.[^"\\]*)*")|\b(?:undefined|void 0)\b')
     PC_KEYS_LINK = (
         "note",
         "noteDetailMap",
@@ -21,7 +26,51 @@ class Converter:
     )
 
     def run(self, content: str) -> dict:
-        return self._filter_object(self._convert_object(self._extract_object(content)))
+        if (data := self._fast_convert(content)) is None:
+            data = self._convert_object(self._extract_object(content))
+        return self._filter_object(data)
+
+    def _fast_convert(self, html: str) -> dict | None:
+        """直接定位脚本文本并按 JSON 解析，失败时返回 None，由 YAML 解析兜底"""
+        if not (script := self._scan_object(html)):
+            return None
+        try:
+            return self._convert_json(script)
+        except ValueError:
+            return None
+
+    @classmethod
+    def _scan_object(cls, html: str) -> str:
+        if not html:
+            return ""
+        end = len(html)
+        while (start := html.rfind(cls.SCRIPT_PREFIX, 0, end)) != -1:
+            end = start
+            # 与 get_script 保持一致：脚本内容必须以 window.__INITIAL_STATE__ 开头
+            if html[start - 1 : start] != ">":
+                continue
+            tag = html.rfind("<", 0, start)
+            if html[tag : tag + 7].lower() != "<script":
+                continue
+            if (close := html.find("</script", start)) == -1:
+                return ""
+            return html[start:close]
+        return ""
+
+    @classmethod
+    def _convert_json(cls, text: str) -> dict:
+        text = text[len(cls.SCRIPT_PREFIX) :].lstrip().removeprefix("=").strip()
+        text = text.removesuffix(";")
+        if "undefined" in text or "void 0" in text:
+            text = cls.JS_LITERAL.sub(cls.__replace_literal, text)
+        data = loads(text)
+        if not isinstance(data, dict):
+            raise ValueError
+        return data
+
+    @staticmethod
+    def __replace_literal(match) -> str:
+        return match.group(1) or "null"
 
     def _extract_object(self, html: str) -> str:
         if not html:
@@ -5,3 +5,33 @@ class CacheError(Exception):
 
     def __str__(self):
         return self.message
+
+
+class QueueFullError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class RequestError(Exception):
+    """请求失败，kind 决定 retry 是否继续重试
+
+    result 为放弃重试后 retry 返回的值；为 None 时 retry 重新抛出该异常
+    """
+
+    PERMANENT = "permanent"  # 重试无法恢复，例如 404
+    TRANSIENT = "transient"  # 超时、连接失败、服务器异常
+    THROTTLED = "throttled"  # 被限流或触发验证
+    CIRCUIT_OPEN = "circuit_open"  # 域名熔断中，不发起请求
+
+    def __init__(self, message: str, kind: str = TRANSIENT, result=None):
+        super().__init__(message)
+        self.message = message
+        self.kind = kind
+        self.result = result
+
+    def __str__(self):
+        return self.message
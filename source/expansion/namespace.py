@@ -1,10 +1,26 @@
-from copy import deepcopy
+from functools import lru_cache
 from types import SimpleNamespace
 from typing import Union
 
 __all__ = ["Namespace"]
 
 
+@lru_cache(maxsize=1024)
+def parse_chain(attribute_chain: str) -> tuple[tuple[str, int | None], ...] | None:
+    """将 "video.media.stream.h264[0]" 解析为属性步骤，索引格式错误时返回 None"""
+    steps = []
+    for attribute in attribute_chain.split("."):
+        if "[" in attribute:
+            attribute, index = attribute.split("[", 1)
+            try:
+                steps.append((attribute, int(index[:-1])))
+            except ValueError:
+                return None
+        else:
+            steps.append((attribute, None))
+    return tuple(steps)
+
+
 class Namespace:
     def __init__(self, data: dict) -> None:
         self.data: SimpleNamespace = self.generate_data_object(data)
@@ -36,22 +52,20 @@ class Namespace:
         attribute_chain: str,
         default: Union[str, int, list, dict, SimpleNamespace] = "",
     ):
-        data = deepcopy(data_object)
-        attributes = attribute_chain.split(".")
-        for attribute in attributes:
-            if "[" in attribute:
-                parts = attribute.split("[", 1)
-                attribute = parts[0]
-                index = parts[1][:-1]
+        # 只读访问，不复制数据对象；调用方不应修改返回值
+        if (steps := parse_chain(attribute_chain)) is None:
+            return default
+        data = data_object
+        for attribute, index in steps:
+            if index is None:
+                data = getattr(data, attribute, None)
+                if not data:
+                    return default
+            else:
                 try:
-                    index = int(index)
                     data = getattr(data, attribute, None)[index]
                 except (IndexError, TypeError, ValueError):
                     return default
-            else:
-                data = getattr(data, attribute, None)
-                if not data:
-                    return default
         return data or default
 
     @classmethod
@@ -2,20 +2,42 @@ from .extend import Account
 from .manager import Manager
 from .model import (
     BatchDownloadParams,
+    BatchExtractParams,
     DownloadShareParams,
     DownloadShareResponse,
     DownloadStatistics,
     ExtractData,
     ExtractParams,
     SQLiteDataResponse,
+    SQLitePageResponse,
+    SQLiteQueryParams,
     TaskAcceptedResponse,
     TaskStatusResponse,
 )
 from .recorder import DataRecorder
 from .recorder import IDRecorder
 from .recorder import MapRecorder
+from .recorder import TaskRecorder
+from .cache import MediaCache
 from .mapping import Mapping
 from .settings import Settings
+from .proxy import ProxyClientPool
+from .limiter import RateLimiter
+from .job import JobScheduler
+from .policy import CircuitBreaker, RetryPolicy
+from .scheduler import DownloadScheduler
+from .writer import FileWriter
+from .listing import DirectoryListing
+from .transport import CDNTransport
+from .metrics import (
+    REGISTRY,
+    REQUEST_DURATION,
+    PARSE_DURATION,
+    TASKS,
+    TASK_PROGRESS,
+    JOB_QUEUE,
+    RATE_LIMIT,
+)
 from .static import (
     VERSION_MAJOR,
     VERSION_MINOR,
@@ -37,7 +59,6 @@ from .static import (
     USERAGENT,
     FILE_SIGNATURES,
     FILE_SIGNATURES_LENGTH,
-    MAX_WORKERS,
     __VERSION__,
 )
 from .tools import (
@@ -0,0 +1,228 @@
+from asyncio import to_thread
+from hashlib import sha256
+from os import link, replace, utime
+from pathlib import Path
+from shutil import copy2
+from time import time
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from aiosqlite import connect
+
+from ..translation import _
+from .recorder import IDRecorder
+from .static import ERROR
+from .tools import logging
+
+if TYPE_CHECKING:
+    from ..module import Manager
+
+__all__ = ["MediaCache"]
+
+
+class MediaCache(IDRecorder):
+    """按 CDN 文件标识与文件内容去重的本地文件缓存
+
+    相同标识或相同内容的文件只保存一份，通过硬链接放置到下载目录，
+    无法创建硬链接时复制文件；下载目录中的文件全部删除后由 collect 清理，
+    复制的文件通过记录的文件路径判断是否已删除
+    """
+
+    INSERT = (
+        "REPLACE INTO media (KEY, HASH, SUFFIX, SIZE, USED, PATH) "
+        "VALUES (?, ?, ?, ?, ?, ?);"
+    )
+    HASH_CHUNK = 1024 * 1024
+
+    def __init__(self, manager: "Manager"):
+        super().__init__(manager)
+        self.name = "MediaCache.db"
+        self.file = manager.root.joinpath(self.name)
+        self.changed = True
+        self.switch = manager.media_cache["enable"]
+        self.max_age = manager.media_cache["max_age"] * 24 * 60 * 60
+        self.store = manager.root.joinpath("MediaCache")
+        self.write_mtime = manager.write_mtime
+
+    async def _connect_database(self):
+        self.database = await connect(self.file)
+        await self._enable_wal()
+        self.cursor = await self.database.cursor()
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS media ("
+            "KEY TEXT PRIMARY KEY,"
+            "HASH TEXT NOT NULL,"
+            "SUFFIX TEXT NOT NULL,"
+            "SIZE INTEGER NOT NULL,"
+            "USED REAL NOT NULL,"
+            "PATH TEXT NOT NULL DEFAULT ''"
+            ");"
+        )
+        await self.database.execute(
+            "CREATE INDEX IF NOT EXISTS media_hash ON media (HASH);"
+        )
+        await self.database.commit()
+
+    async def __aenter__(self):
+        await super().__aenter__()
+        if self.switch:
+            await self.collect()
+        return self
+
+    @staticmethod
+    def key(url: str) -> str:
+        """文件标识：图片 token 或视频 key，保留决定文件格式的查询参数，忽略 CDN 域名"""
+        url = urlparse(url)
+        return (
+            f"{url.path.lstrip('/')}?{url.query}" if url.query else url.path.lstrip("/")
+        )
+
+    def __blob(self, hash_: str, suffix: str) -> Path:
+        return self.store.joinpath(hash_[:2], f"{hash_}.{suffix}")
+
+    async def select(self, key: str) -> tuple | None:
+        if self.switch:
+            if row := self._buffered(key):
+                return row
+            return await self._fetchone(
+                "SELECT KEY, HASH, SUFFIX, SIZE, USED, PATH FROM media WHERE KEY=?",
+                (key,),
+            )
+
+    async def add(
+        self,
+        key: str,
+        hash_: str,
+        suffix: str,
+        size: int,
+        path: Path = None,
+        *args,
+        **kwargs,
+    ) -> None:
+        if self.switch:
+            self._enqueue(key, (key, hash_, suffix, size, time(), str(path or "")))
+
+    async def fetch(
+        self,
+        url: str,
+        path: Path,
+        name: str,
+        mtime: int,
+    ) -> Path | None:
+        """缓存中存在该文件时放置到下载目录并返回文件路径"""
+        if not self.switch or not (row := await self.select(key := self.key(url))):
+            return None
+        hash_, suffix, size = row[1:4]
+        if not (blob := self.__blob(hash_, suffix)).is_file():
+            return None
+        target = path.joinpath(f"{name}.{suffix}")
+        await to_thread(self.__place, blob, target, mtime)
+        await self.add(key, hash_, suffix, size, target)
+        logging(self.print, _("文件 {0} 已存在于缓存，跳过下载").format(target.name))
+        return target
+
+    def __place(self, blob: Path, target: Path, mtime: int) -> None:
+        # 硬链接共享修改时间，需要写入作品发布时间时复制文件
+        if not self.write_mtime:
+            try:
+                link(blob, target)
+                return
+            except OSError:
+                pass
+        copy2(blob, target)
+        if self.write_mtime and mtime:
+            utime(target, (mtime, mtime))
+
+    async def save(self, url: str, file: Path) -> None:
+        """将下载完成的文件加入缓存"""
+        if not self.switch:
+            return
+        try:
+            hash_, size = await to_thread(self.__save, file)
+        except OSError as error:
+            logging(
+                self.print,
+                _("文件 {0} 加入缓存失败：{1}").format(file.name, repr(error)),
+                ERROR,
+            )
+            return
+        await self.add(self.key(url), hash_, file.suffix[1:], size, file)
+
+    def __save(self, file: Path) -> tuple[str, int]:
+        hash_ = sha256()
+        with file.open("rb") as f:
+            while chunk := f.read(self.HASH_CHUNK):
+                hash_.update(chunk)
+        hash_ = hash_.hexdigest()
+        blob = self.__blob(hash_, file.suffix[1:])
+        if blob.is_file():
+            # 内容与其他标识的文件相同，改为链接到已缓存的文件
+            if not self.write_mtime:
+                temp = file.with_name(f"{file.name}.link")
+                try:
+                    link(blob, temp)
+                    replace(temp, file)
+                except OSError:
+                    temp.unlink(missing_ok=True)
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                link(file, blob)
+            except OSError:
+                copy2(file, blob)
+        return hash_, file.stat().st_size
+
+    async def collect(self) -> None:
+        """删除下载目录中已不存在且超过 max_age 未使用的缓存文件"""
+        await self.flush()
+        async with self.database.execute(
+            "SELECT KEY, HASH, SUFFIX, USED, PATH FROM media"
+        ) as cursor:
+            rows = await cursor.fetchall()
+        keys, size = await to_thread(self.__collect, rows, time() - self.max_age)
+        if keys:
+            await self.delete(keys)
+            logging(
+                self.print,
+                _("已清理 {0} 条文件缓存，释放 {1:.1f} MB").format(
+                    len(keys),
+                    size / 1024 / 1024,
+                ),
+            )
+
+    def __collect(self, rows: list[tuple], deadline: float) -> tuple[list[str], int]:
+        blobs: dict[Path, list[tuple[str, float, str]]] = {}
+        for key, hash_, suffix, used, path in rows:
+            blobs.setdefault(self.__blob(hash_, suffix), []).append((key, used, path))
+        keys, size = [], 0
+        for blob, items in blobs.items():
+            try:
+                stat = blob.stat()
+            except OSError:
+                keys.extend(i[0] for i in items)
+                continue
+            # 链接数为 1 表示下载目录中已没有链接到该文件的文件，复制的文件需检查记录的路径
+            if (
+                stat.st_nlink == 1
+                and max(i[1] for i in items) < deadline
+                and not any(i[2] and Path(i[2]).is_file() for i in items)
+            ):
+                blob.unlink(missing_ok=True)
+                keys.extend(i[0] for i in items)
+                size += stat.st_size
+        # 数据库中没有记录的文件
+        if self.store.is_dir():
+            for blob in self.store.glob("*/*"):
+                if blob not in blobs:
+                    size += blob.stat().st_size
+                    blob.unlink(missing_ok=True)
+        return keys, size
+
+    async def delete(self, ids: list[str]):
+        if ids := [(i,) for i in ids if i]:
+            await self.flush()
+            await self.database.executemany("DELETE FROM media WHERE KEY=?", ids)
+            await self.database.commit()
+
+    async def all(self):
+        pass
@@ -0,0 +1,150 @@
+from asyncio import CancelledError, Future, get_running_loop
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from time import perf_counter
+
+from ..expansion import QueueFullError
+from ..translation import _
+
+__all__ = ["JobScheduler"]
+
+
+class JobScheduler:
+    """统一调度各入口提交的作品处理任务
+
+    优先级数值越小越先执行；同一优先级内按客户端轮流执行，同一客户端内先进先出
+    """
+
+    PRIORITIES = {
+        "interactive": 0,  # API、MCP、CLI 的单个作品请求
+        "script": 1,  # 用户脚本推送的作品
+        "batch": 2,  # 批量下载任务中的作品
+    }
+    default = {
+        "workers": 4,  # 同时处理的任务数量
+        "max_queue": 100,  # 等待执行的任务数量上限，超出时拒绝新任务
+    }
+
+    def __init__(self, workers: int = 4, max_queue: int = 100):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.active = 0
+        self.queues: list[OrderedDict[str, deque[Future]]] = [
+            OrderedDict() for __ in self.PRIORITIES
+        ]
+        self.waiting = [0 for __ in self.PRIORITIES]
+        # 受 max_queue 限制的等待任务
+        self.bounded: set[Future] = set()
+        self.submitted = [0 for __ in self.PRIORITIES]
+        self.rejected = [0 for __ in self.PRIORITIES]
+        self.wait_time = [0.0 for __ in self.PRIORITIES]
+        self.max_wait_time = [0.0 for __ in self.PRIORITIES]
+
+    @classmethod
+    def from_settings(cls, data: dict | None, concurrency: int = 1) -> "JobScheduler":
+        """未设置 workers 时不少于 concurrency，避免批量处理的并发数被任务调度器限制"""
+        params = cls.default | {"workers": max(cls.default["workers"], concurrency)}
+        default = params.copy()
+        if isinstance(data, dict):
+            params |= {k: v for k, v in data.items() if k in params}
+        for key, value in params.items():
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                params[key] = default[key]
+        return cls(**params)
+
+    @asynccontextmanager
+    async def slot(self, priority: str, client: str, bounded: bool = True):
+        """获取执行槽位
+
+        :param priority: PRIORITIES 中的优先级名称
+        :param client: 客户端标识，用于在同一优先级内轮流执行
+        :param bounded: 是否受 max_queue 限制；批量任务已限制并发数量，不受此限制
+        """
+        await self.acquire(priority, client, bounded)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: str, client: str, bounded: bool = True):
+        level = self.PRIORITIES[priority]
+        self.submitted[level] += 1
+        if self.active < self.workers and not any(self.waiting):
+            self.active += 1
+            return
+        if bounded and len(self.bounded) >= self.max_queue:
+            self.rejected[level] += 1
+            raise QueueFullError(_("任务队列已满，请稍后重试"))
+        future = get_running_loop().create_future()
+        if bounded:
+            self.bounded.add(future)
+        self.queues[level].setdefault(client, deque()).append(future)
+        self.waiting[level] += 1
+        start = perf_counter()
+        try:
+            await future
+        except CancelledError:
+            if future.done() and not future.cancelled():
+                # 已获得槽位后被取消，将槽位交给下一个任务
+                self.release()
+            else:
+                self.__remove(level, client, future)
+            raise
+        finally:
+            elapsed = perf_counter() - start
+            self.wait_time[level] += elapsed
+            self.max_wait_time[level] = max(self.max_wait_time[level], elapsed)
+
+    def release(self):
+        if future := self.__next():
+            # 槽位直接转交给下一个任务，active 保持不变
+            future.set_result(None)
+        else:
+            self.active -= 1
+
+    def __next(self) -> Future | None:
+        for level, queue in enumerate(self.queues):
+            while queue:
+                client, futures = next(iter(queue.items()))
+                future = futures.popleft()
+                if futures:
+                    queue.move_to_end(client)
+                else:
+                    del queue[client]
+                self.waiting[level] -= 1
+                self.bounded.discard(future)
+                # 已取消的任务尚未从队列移除时跳过
+                if not future.done():
+                    return future
+        return None
+
+    def __remove(self, level: int, client: str, future: Future):
+        if (futures := self.queues[level].get(client)) and future in futures:
+            futures.remove(future)
+            self.waiting[level] -= 1
+            self.bounded.discard(future)
+            if not futures:
+                del self.queues[level][client]
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "active": self.active,
+            "max_queue": self.max_queue,
+            "queued": len(self.bounded),
+            "queues": {
+                name: {
+                    "waiting": self.waiting[level],
+                    "clients": len(self.queues[level]),
+                    "submitted": self.submitted[level],
+                    "rejected": self.rejected[level],
+                    "average_wait": (
+                        self.wait_time[level] / self.submitted[level]
+                        if self.submitted[level]
+                        else 0.0
+                    ),
+                    "max_wait": self.max_wait_time[level],
+                }
+                for name, level in self.PRIORITIES.items()
+            },
+        }
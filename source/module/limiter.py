@@ -0,0 +1,134 @@
+from asyncio import Lock, sleep
+from time import monotonic
+from urllib.parse import urlparse
+
+from .tools import sleep_time
+
+__all__ = ["RateLimiter"]
+
+
+class _Bucket:
+    __slots__ = ("rate", "tokens", "updated", "lock")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = Lock()
+
+
+class RateLimiter:
+    """按域名限制请求速率
+
+    fixed: 每次请求后随机等待 5 - 10 秒，与旧版本行为一致
+    token_bucket: 按固定速率发放令牌
+    adaptive: 在令牌桶基础上使用 AIMD 算法调整速率，响应正常时线性加速，被限流时成倍降速
+    """
+
+    MODES = ("fixed", "token_bucket", "adaptive")
+    # 461 为小红书风控验证状态码
+    THROTTLE_STATUS = {429, 461, 471}
+    default = {
+        "mode": "adaptive",
+        "rate": 0.2,  # 每个域名的初始速率，单位：请求/秒
+        "min_rate": 0.05,
+        "max_rate": 1.0,
+        "burst": 1,
+        "increase": 0.02,  # 响应正常时速率增加值
+        "decrease": 0.5,  # 被限流时速率乘数
+    }
+
+    def __init__(
+        self,
+        mode: str = "adaptive",
+        rate: float = 0.2,
+        min_rate: float = 0.05,
+        max_rate: float = 1.0,
+        burst: float = 1,
+        increase: float = 0.02,
+        decrease: float = 0.5,
+    ):
+        self.mode = mode
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.buckets: dict[str, _Bucket] = {}
+
+    @classmethod
+    def from_settings(cls, data: dict | None) -> "RateLimiter":
+        params = cls.default.copy()
+        if isinstance(data, dict):
+            params |= {k: v for k, v in data.items() if k in params}
+        if params["mode"] not in cls.MODES:
+            params["mode"] = cls.default["mode"]
+        for key in ("rate", "min_rate", "max_rate", "burst", "increase", "decrease"):
+            value = params[key]
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                params[key] = cls.default[key]
+            elif value <= 0:
+                params[key] = cls.default[key]
+        params["min_rate"] = min(params["min_rate"], params["max_rate"])
+        params["rate"] = min(
+            max(params["rate"], params["min_rate"]), params["max_rate"]
+        )
+        params["decrease"] = min(params["decrease"], 1)
+        # 令牌数量上限小于 1 时永远无法获得令牌
+        params["burst"] = max(params["burst"], 1)
+        return cls(**params)
+
+    @staticmethod
+    def host(url: str) -> str:
+        return urlparse(url).hostname or url
+
+    def __bucket(self, host: str) -> _Bucket:
+        if not (bucket := self.buckets.get(host)):
+            bucket = self.buckets[host] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    async def acquire(self, url: str) -> None:
+        """请求前调用，等待令牌"""
+        if self.mode == "fixed":
+            return
+        bucket = self.__bucket(self.host(url))
+        async with bucket.lock:
+            while True:
+                now = monotonic()
+                bucket.tokens = min(
+                    self.burst,
+                    bucket.tokens + (now - bucket.updated) * bucket.rate,
+                )
+                bucket.updated = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                await sleep((1 - bucket.tokens) / bucket.rate)
+
+    async def feedback(self, url: str, status: int | None = None) -> None:
+        """请求结束后调用，status 为 None 表示请求未获得响应"""
+        match self.mode:
+            case "fixed":
+                await sleep_time()
+            case "adaptive":
+                bucket = self.__bucket(self.host(url))
+                if self.is_throttled(status):
+                    bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                    # 清空令牌，避免降速后立即发起请求
+                    bucket.tokens = min(bucket.tokens, 0)
+                elif status < 400:
+                    bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    @classmethod
+    def is_throttled(cls, status: int | None) -> bool:
+        return status is None or status in cls.THROTTLE_STATUS or status >= 500
+
+    def rate(self, url: str) -> float:
+        if self.mode == "fixed":
+            return 0.0
+        return self.__bucket(self.host(url)).rate
+
+    def metrics(self) -> dict[str, float]:
+        """当前各域名的请求速率，单位：请求/秒"""
+        return {host: bucket.rate for host, bucket in self.buckets.items()}
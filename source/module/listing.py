@@ -0,0 +1,71 @@
+from asyncio import Task, create_task, shield, to_thread
+from collections import OrderedDict
+from os import scandir
+from os.path import normcase
+from pathlib import Path
+from time import monotonic
+
+__all__ = ["DirectoryListing"]
+
+
+class DirectoryListing:
+    """缓存文件夹内的文件名称，使用一次 scandir 代替逐个文件调用 stat
+
+    调用 load 在线程中读取文件夹，避免大文件夹或网络文件系统阻塞事件循环；
+    程序写入的文件通过 add 更新缓存；其他程序新增或删除的文件最长在 TTL 秒后才会生效
+    """
+
+    MAX_FOLDERS = 256
+    TTL = 300
+
+    def __init__(self, max_folders: int = MAX_FOLDERS, ttl: int | float = TTL):
+        self.max_folders = max_folders
+        self.ttl = ttl
+        self.folders: OrderedDict[Path, tuple[float, set[str]]] = OrderedDict()
+        self.loading: dict[Path, Task] = {}
+
+    def __cached(self, folder: Path) -> set[str] | None:
+        if (cache := self.folders.get(folder)) and cache[0] > monotonic():
+            self.folders.move_to_end(folder)
+            return cache[1]
+        return None
+
+    @staticmethod
+    def __scan(folder: Path) -> set[str]:
+        try:
+            with scandir(folder) as entries:
+                return {normcase(i.name) for i in entries}
+        except FileNotFoundError:
+            return set()
+
+    def __store(self, folder: Path, names: set[str]) -> set[str]:
+        self.folders[folder] = (monotonic() + self.ttl, names)
+        self.folders.move_to_end(folder)
+        while len(self.folders) > self.max_folders:
+            self.folders.popitem(last=False)
+        return names
+
+    async def load(self, folder: Path) -> None:
+        """缓存不存在或已过期时读取文件夹，同一文件夹同时只读取一次"""
+        if self.__cached(folder) is not None:
+            return
+        if not (task := self.loading.get(folder)):
+            task = self.loading[folder] = create_task(self.__load(folder))
+        # 等待的下载任务被取消时不影响其他等待同一文件夹的任务
+        await shield(task)
+
+    async def __load(self, folder: Path) -> None:
+        try:
+            self.__store(folder, await to_thread(self.__scan, folder))
+        finally:
+            self.loading.pop(folder, None)
+
+    def exists(self, folder: Path, name: str) -> bool:
+        # 未调用 load 时直接读取文件夹
+        if (names := self.__cached(folder)) is None:
+            names = self.__store(folder, self.__scan(folder))
+        return normcase(name) in names
+
+    def add(self, file: Path) -> None:
+        if cache := self.folders.get(file.parent):
+            cache[1].add(normcase(file.name))
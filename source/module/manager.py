@@ -1,7 +1,9 @@
+from asyncio import to_thread
+from errno import EXDEV
 from pathlib import Path
 from re import compile, sub
 from shutil import move, rmtree
-from os import utime
+from os import replace, utime
 from http.cookies import SimpleCookie
 from httpx import (
     AsyncClient,
@@ -15,6 +17,12 @@ from httpx import (
 from source.expansion import remove_empty_directories
 
 from ..translation import _
+from .job import JobScheduler
+from .limiter import RateLimiter
+from .policy import RetryPolicy
+from .proxy import ProxyClientPool
+from .scheduler import DownloadScheduler
+from .transport import CDNTransport
 from .static import HEADERS, USERAGENT, WARNING
 from .tools import logging
 from typing import TYPE_CHECKING
@@ -73,6 +81,14 @@ class Manager:
         author_archive: bool,
         write_mtime: bool,
         script_server: bool,
+        concurrency: int,
+        rate_limit: dict,
+        download_scheduler: dict,
+        segment_download: dict,
+        job_scheduler: dict,
+        retry_policy: dict,
+        download_client: dict,
+        media_cache: dict,
         cleaner: "Cleaner",
         print_object,
     ):
@@ -113,14 +129,20 @@ class Manager:
             },
         )
         self.download_client = AsyncClient(
+            headers=self.blank_headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=CDNTransport.from_settings(
+                download_client,
+                proxy=self.proxy,
+                verify=False,
+            ),
+        )
+        self.proxy_clients = ProxyClientPool(
             headers=self.blank_headers,
             timeout=timeout,
             verify=False,
             follow_redirects=True,
-            mounts={
-                "http://": AsyncHTTPTransport(proxy=self.proxy),
-                "https://": AsyncHTTPTransport(proxy=self.proxy),
-            },
         )
         self.image_download = self.check_bool(image_download, True)
         self.video_download = self.check_bool(video_download, True)
@@ -129,6 +151,17 @@ class Manager:
         self.author_archive = self.check_bool(author_archive, False)
         self.write_mtime = self.check_bool(write_mtime, False)
         self.script_server = self.check_bool(script_server, False)
+        self.concurrency = self.check_positive_int(concurrency, 1)
+        self.limiter = RateLimiter.from_settings(rate_limit)
+        self.download_scheduler = DownloadScheduler.from_settings(download_scheduler)
+        self.segment_download = self.__check_segment_download(segment_download)
+        self.job_scheduler = JobScheduler.from_settings(
+            job_scheduler,
+            self.concurrency,
+        )
+        self.media_cache = self.__check_media_cache(media_cache)
+        self.retry_policy = RetryPolicy.from_settings(retry_policy)
+        self.breaker = self.retry_policy.breaker
         self.create_folder()
 
     def __check_path(self, path: str) -> Path:
@@ -176,16 +209,23 @@ class Manager:
         return root.joinpath(name) if folder_mode else root
 
     @classmethod
-    def move(
+    async def move(
         cls,
         temp: Path,
         path: Path,
         mtime: int = None,
         rewrite: bool = False,
     ):
-        move(temp.resolve(), path.resolve())
+        temp, path = temp.resolve(), path.resolve()
+        try:
+            # 同一文件系统内直接重命名，原子操作且不阻塞事件循环
+            replace(temp, path)
+        except OSError as error:
+            if error.errno != EXDEV:
+                raise
+            await to_thread(move, temp, path)
         if rewrite and mtime:
-            cls.update_mtime(path.resolve(), mtime)
+            cls.update_mtime(path, mtime)
 
     @staticmethod
     def update_mtime(file: Path, mtime: int):
@@ -202,9 +242,33 @@ class Manager:
     def check_bool(value: bool, default: bool) -> bool:
         return value if isinstance(value, bool) else default
 
+    @staticmethod
+    def check_positive_int(value: int, default: int) -> int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            return default
+        return value if value > 0 else default
+
+    @classmethod
+    def __check_segment_download(cls, data: dict) -> dict:
+        data = data if isinstance(data, dict) else {}
+        return {
+            "enable": cls.check_bool(data.get("enable"), False),
+            "min_size": cls.check_positive_int(data.get("min_size"), 200) * 1024 * 1024,
+            "segments": cls.check_positive_int(data.get("segments"), 4),
+        }
+
+    @classmethod
+    def __check_media_cache(cls, data: dict) -> dict:
+        data = data if isinstance(data, dict) else {}
+        return {
+            "enable": cls.check_bool(data.get("enable"), False),
+            "max_age": cls.check_positive_int(data.get("max_age"), 30),
+        }
+
     async def close(self):
         await self.request_client.aclose()
         await self.download_client.aclose()
+        await self.proxy_clients.close()
         # self.__clean()
         remove_empty_directories(self.root)
         remove_empty_directories(self.folder)
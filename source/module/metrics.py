@@ -0,0 +1,250 @@
+from bisect import bisect_left
+from math import inf
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "REQUEST_DURATION",
+    "RETRIES",
+    "RETRY_BACKOFF",
+    "RETRY_EXHAUSTED",
+    "CIRCUIT_OPENED",
+    "DOWNLOAD_BYTES",
+    "DOWNLOAD_FILES",
+    "DOWNLOAD_THROUGHPUT",
+    "DOWNLOAD_WAIT",
+    "DOWNLOAD_CONNECTIONS",
+    "DOWNLOAD_REQUESTS",
+    "DNS_CACHE",
+    "SQLITE_WRITE_DURATION",
+    "SQLITE_WRITE_ROWS",
+    "PARSE_DURATION",
+    "TASKS",
+    "TASK_PROGRESS",
+    "JOB_QUEUE",
+    "RATE_LIMIT",
+]
+
+
+class Registry:
+    """以 Prometheus 文本格式输出指标"""
+
+    def __init__(self):
+        self.metrics: list["_Metric"] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self.metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    TYPE = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict[tuple, object] = {}
+        if registry:
+            registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(i, "") for i in self.labels)
+
+    def clear(self) -> None:
+        self.values.clear()
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}"
+            for k, v in self.values.items()
+        ]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: int | float = 1, **labels) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def set(self, value: int | float, **labels) -> None:
+        self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = BUCKETS,
+        registry: Registry = REGISTRY,
+    ):
+        super().__init__(name, documentation, labels, registry)
+        self.buckets = tuple(sorted(buckets)) + (inf,)
+
+    def observe(self, value: int | float, **labels) -> None:
+        key = self._key(labels)
+        if not (data := self.values.get(key)):
+            # 各区间计数、总和、数量
+            data = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        data[0][bisect_left(self.buckets, value)] += 1
+        data[1] += value
+        data[2] += 1
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bucket, value in zip(self.buckets, counts):
+                cumulative += value
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labels, key, f'le="{_format_value(bucket)}"')}"
+                    f" {cumulative}"
+                )
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "xhs_request_duration_seconds",
+    "Request latency by host and status code.",
+    ("host", "status"),
+)
+RETRIES = Counter(
+    "xhs_retries_total",
+    "Retries performed by the retry decorator by error type.",
+    ("function", "kind"),
+)
+RETRY_BACKOFF = Counter(
+    "xhs_retry_backoff_seconds_total",
+    "Time spent backing off before retries.",
+    ("function",),
+)
+RETRY_EXHAUSTED = Counter(
+    "xhs_retry_exhausted_total",
+    "Calls that gave up, either on a permanent error or after the last retry.",
+    ("function", "kind"),
+)
+CIRCUIT_OPENED = Counter(
+    "xhs_circuit_opened_total",
+    "Times the circuit breaker opened for a host.",
+    ("host",),
+)
+DOWNLOAD_BYTES = Counter(
+    "xhs_download_bytes_total",
+    "Bytes downloaded by file type.",
+    ("kind",),
+)
+DOWNLOAD_FILES = Counter(
+    "xhs_download_files_total",
+    "Finished file downloads by file type and result.",
+    ("kind", "result"),
+)
+DOWNLOAD_THROUGHPUT = Histogram(
+    "xhs_download_throughput_bytes_per_second",
+    "Throughput of each successful file download.",
+    ("kind",),
+    buckets=tuple(2**i * 1024 for i in range(4, 17)),
+)
+DOWNLOAD_WAIT = Histogram(
+    "xhs_download_slot_wait_seconds",
+    "Time spent waiting for a download slot.",
+    ("kind",),
+)
+DOWNLOAD_CONNECTIONS = Counter(
+    "xhs_download_connections_total",
+    "Connections opened by the download client by host.",
+    ("host",),
+)
+DOWNLOAD_REQUESTS = Counter(
+    "xhs_download_requests_total",
+    "Requests sent by the download client by host and HTTP version.",
+    ("host", "version"),
+)
+DNS_CACHE = Counter(
+    "xhs_dns_cache_total",
+    "DNS cache lookups of the download client by result.",
+    ("result",),
+)
+SQLITE_WRITE_DURATION = Histogram(
+    "xhs_sqlite_write_duration_seconds",
+    "Latency of batched SQLite writes by database.",
+    ("database",),
+)
+SQLITE_WRITE_ROWS = Counter(
+    "xhs_sqlite_write_rows_total",
+    "Rows written to SQLite by database.",
+    ("database",),
+)
+PARSE_DURATION = Histogram(
+    "xhs_parse_duration_seconds",
+    "Time spent converting note HTML into data.",
+)
+TASKS = Gauge(
+    "xhs_tasks",
+    "Batch download tasks by status.",
+    ("status",),
+)
+TASK_PROGRESS = Gauge(
+    "xhs_task_progress",
+    "Progress counters of each batch download task.",
+    ("task_id", "mode", "status", "field"),
+)
+JOB_QUEUE = Gauge(
+    "xhs_job_queue",
+    "Job scheduler state by priority.",
+    ("priority", "field"),
+)
+RATE_LIMIT = Gauge(
+    "xhs_rate_limit_requests_per_second",
+    "Current request rate allowed by the rate limiter by host.",
+    ("host",),
+)
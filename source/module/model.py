@@ -18,6 +18,41 @@ class ExtractData(BaseModel):
     data: dict | None
 
 
+class BatchExtractParams(BaseModel):
+    urls: list[str] = Field(
+        min_length=1,
+        max_length=100,
+        description="小红书作品链接列表，每项对应一个作品，最多 100 项",
+    )
+    download: bool = Field(default=False, description="是否下载作品文件")
+    index: list[str | int] | None = Field(
+        default=None,
+        description="仅下载图文作品中的指定图片序号，例如 [1, 3, 5]",
+    )
+    cookie: str | None = Field(
+        default=None,
+        description="请求时使用的 Cookie，未传时使用程序配置中的 Cookie",
+    )
+    proxy: str | None = Field(
+        default=None,
+        description="请求代理，可选，支持 http(s)/socks5",
+    )
+    skip: bool = Field(
+        default=False,
+        description="是否跳过已存在下载记录的作品",
+    )
+    concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        le=32,
+        description="同时处理的作品数量，未传时使用程序配置中的 concurrency，不能大于 job_scheduler 的 workers",
+    )
+    format: Literal["ndjson", "sse"] = Field(
+        default="ndjson",
+        description="结果格式：ndjson 每行一个 JSON 对象，sse 为 Server-Sent Events",
+    )
+
+
 class DownloadShareParams(BaseModel):
     url: str = Field(description="小红书作品链接或短链接，必填")
     index: list[str | int] | None = Field(
@@ -55,6 +90,12 @@ class BatchDownloadParams(BaseModel):
         ge=1,
         description="最多处理的作品数量，默认不限制",
     )
+    concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        le=32,
+        description="同时处理的作品数量，未传时使用程序配置中的 concurrency，不能大于 job_scheduler 的 workers",
+    )
 
 
 class DownloadStatistics(BaseModel):
@@ -87,8 +128,56 @@ class TaskStatusResponse(BaseModel):
     progress: DownloadStatistics
     summary: DownloadStatistics
     errors: list[str] = Field(default_factory=list)
+    error_count: int = 0
 
 
 class SQLiteDataResponse(BaseModel):
     message: str
     data: dict[str, list[dict[str, Any]]]
+
+
+class SQLiteQueryParams(BaseModel):
+    cursor: int = Field(
+        default=0,
+        ge=0,
+        description="上一页返回的 next_cursor，首次请求不传",
+    )
+    limit: int = Field(
+        default=100,
+        ge=1,
+        le=1000,
+        description="每页返回的记录数量，导出模式下不生效",
+    )
+    fields: str | None = Field(
+        default=None,
+        description="返回的字段，多个字段使用英文逗号分隔，例如 note_id,title；默认返回全部字段",
+    )
+    author_id: str | None = Field(
+        default=None,
+        description="仅返回指定作者 ID 的记录，适用于 explore_data 与 mapping_data",
+    )
+    note_type: str | None = Field(
+        default=None,
+        description="仅返回指定作品类型的记录，例如 图文、视频，适用于 explore_data",
+    )
+    published_after: str | None = Field(
+        default=None,
+        description="仅返回发布时间不早于该时间的记录，格式为 YYYY-MM-DD 或 YYYY-MM-DD_HH:MM:SS，适用于 explore_data",
+    )
+    published_before: str | None = Field(
+        default=None,
+        description="仅返回发布时间早于该时间的记录，格式同 published_after，适用于 explore_data",
+    )
+    format: Literal["json", "ndjson", "csv"] = Field(
+        default="json",
+        description="json 分页返回；ndjson 与 csv 从 cursor 位置开始流式导出全部符合条件的记录",
+    )
+
+
+class SQLitePageResponse(BaseModel):
+    message: str
+    data: list[dict[str, Any]]
+    next_cursor: int | None = Field(
+        default=None,
+        description="下一页的 cursor 参数，没有更多记录时为 null",
+    )
@@ -0,0 +1,148 @@
+from random import uniform
+from time import monotonic
+
+from httpx import (
+    HTTPError,
+    HTTPStatusError,
+    NetworkError,
+    RemoteProtocolError,
+    TimeoutException,
+)
+
+from ..expansion import RequestError
+from .limiter import RateLimiter
+from .metrics import CIRCUIT_OPENED
+
+__all__ = ["RetryPolicy", "CircuitBreaker"]
+
+
+class RetryPolicy:
+    """根据错误类型决定是否重试以及重试前的等待时间"""
+
+    # 重试无法恢复的状态码
+    PERMANENT_STATUS = {400, 401, 403, 404, 405, 410, 451}
+    default = {
+        "base_delay": 1.0,  # 首次重试前的等待时间，单位：秒
+        "max_delay": 30.0,  # 单次重试等待时间上限，单位：秒
+        "throttled_factor": 4.0,  # 被限流时等待时间乘数
+        "failure_threshold": 5,  # 连续失败多少次后熔断域名
+        "recovery_time": 60.0,  # 熔断持续时间，单位：秒
+    }
+
+    def __init__(
+        self,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        throttled_factor: float = 4.0,
+        failure_threshold: int = 5,
+        recovery_time: float = 60.0,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttled_factor = throttled_factor
+        self.breaker = CircuitBreaker(failure_threshold, recovery_time)
+
+    @classmethod
+    def from_settings(cls, data: dict | None) -> "RetryPolicy":
+        params = cls.default.copy()
+        if isinstance(data, dict):
+            params |= {k: v for k, v in data.items() if k in params}
+        for key, value in params.items():
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                params[key] = cls.default[key]
+            elif value <= 0:
+                params[key] = cls.default[key]
+        params["failure_threshold"] = int(params["failure_threshold"])
+        return cls(**params)
+
+    def delay(self, attempt: int, kind: str) -> float:
+        """第 attempt 次重试前的等待时间，指数增长并保留一半随机抖动"""
+        delay = self.base_delay * 2 ** (attempt - 1)
+        if kind == RequestError.THROTTLED:
+            delay *= self.throttled_factor
+        delay = min(delay, self.max_delay)
+        return uniform(delay / 2, delay)
+
+    @classmethod
+    def classify(cls, error: HTTPError) -> str:
+        if isinstance(error, HTTPStatusError):
+            return cls.classify_status(error.response.status_code)
+        if isinstance(error, TimeoutException | NetworkError | RemoteProtocolError):
+            return RequestError.TRANSIENT
+        # 无效链接、重定向次数过多等
+        return RequestError.PERMANENT
+
+    @classmethod
+    def classify_status(cls, status: int) -> str:
+        if RateLimiter.is_throttled(status) and status < 500:
+            return RequestError.THROTTLED
+        if status in cls.PERMANENT_STATUS:
+            return RequestError.PERMANENT
+        return RequestError.TRANSIENT
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_until", "probing")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_until = 0.0
+        # 探测请求的截止时间，探测请求未结束时拒绝其他请求
+        self.probing = 0.0
+
+
+class CircuitBreaker:
+    """按域名熔断：连续失败达到阈值后暂停请求，熔断结束后只放行一个探测请求
+
+    探测请求结束时应调用 success、failure 或 release；请求被取消等情况未调用时，
+    探测在 recovery_time 秒后失效，允许发起新的探测请求
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.circuits: dict[str, _Circuit] = {}
+
+    def allow(self, url: str) -> bool:
+        if not (circuit := self.circuits.get(RateLimiter.host(url))):
+            return True
+        if circuit.failures < self.failure_threshold:
+            return True
+        if (now := monotonic()) < circuit.opened_until or now < circuit.probing:
+            return False
+        circuit.probing = now + self.recovery_time
+        return True
+
+    def success(self, url: str) -> None:
+        if circuit := self.circuits.get(RateLimiter.host(url)):
+            circuit.failures = 0
+            circuit.probing = 0.0
+
+    def release(self, url: str) -> None:
+        """结束探测请求，不改变失败次数；请求未得到可判断域名状态的结果时调用"""
+        if circuit := self.circuits.get(RateLimiter.host(url)):
+            circuit.probing = 0.0
+
+    def failure(self, url: str, kind: str) -> None:
+        if kind == RequestError.PERMANENT:
+            # 错误与域名可用性无关，结束探测并重置失败次数
+            self.success(url)
+            return
+        host = RateLimiter.host(url)
+        circuit = self.circuits.setdefault(host, _Circuit())
+        circuit.failures += 1
+        circuit.probing = 0.0
+        if circuit.failures >= self.failure_threshold:
+            circuit.opened_until = monotonic() + self.recovery_time
+            CIRCUIT_OPENED.inc(host=host)
+
+    def metrics(self) -> dict[str, dict[str, int | bool]]:
+        now = monotonic()
+        return {
+            host: {
+                "failures": circuit.failures,
+                "open": circuit.failures >= self.failure_threshold
+                and now < circuit.opened_until,
+            }
+            for host, circuit in self.circuits.items()
+        }
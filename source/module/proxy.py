@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from time import monotonic
+
+from httpx import AsyncClient
+
+__all__ = ["ProxyClientPool"]
+
+
+class _Entry:
+    __slots__ = ("client", "last_used", "active", "evicted")
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+        self.last_used = monotonic()
+        self.active = 0
+        self.evicted = False
+
+
+class ProxyClientPool:
+    """按代理地址复用 AsyncClient，超出容量时淘汰最久未使用的客户端，空闲超时自动关闭"""
+
+    MAX_CLIENTS = 8
+    IDLE_TIMEOUT = 300
+
+    def __init__(
+        self,
+        max_clients: int = MAX_CLIENTS,
+        idle_timeout: int | float = IDLE_TIMEOUT,
+        **client_kwargs,
+    ):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.client_kwargs = client_kwargs
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    @asynccontextmanager
+    async def client(self, proxy: str):
+        entry = await self.__acquire(proxy)
+        try:
+            yield entry.client
+        finally:
+            await self.__release(entry)
+
+    async def __acquire(self, proxy: str) -> _Entry:
+        await self.__expire()
+        if entry := self.entries.get(proxy):
+            self.entries.move_to_end(proxy)
+        else:
+            entry = self.entries[proxy] = _Entry(
+                AsyncClient(
+                    proxy=proxy,
+                    **self.client_kwargs,
+                )
+            )
+            while len(self.entries) > self.max_clients:
+                __, oldest = self.entries.popitem(last=False)
+                await self.__discard(oldest)
+        entry.active += 1
+        return entry
+
+    async def __release(self, entry: _Entry):
+        entry.active -= 1
+        entry.last_used = monotonic()
+        if not entry.active:
+            # 代理客户端由多个调用方共享，没有进行中的请求时清除服务端写入的 Cookie
+            entry.client.cookies.clear()
+            if entry.evicted:
+                await entry.client.aclose()
+        # 不再请求新代理时也关闭其他空闲超时的客户端
+        await self.__expire()
+
+    async def __expire(self):
+        deadline = monotonic() - self.idle_timeout
+        for proxy in [
+            k
+            for k, v in self.entries.items()
+            if not v.active and v.last_used < deadline
+        ]:
+            await self.__discard(self.entries.pop(proxy))
+
+    @staticmethod
+    async def __discard(entry: _Entry):
+        entry.evicted = True
+        if not entry.active:
+            await entry.client.aclose()
+
+    async def close(self):
+        while self.entries:
+            __, entry = self.entries.popitem()
+            await self.__discard(entry)
+
+    def __len__(self):
+        return len(self.entries)
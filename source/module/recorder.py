@@ -1,36 +1,171 @@
-from asyncio import CancelledError
+from asyncio import CancelledError, Event, Lock, create_task, sleep, wait_for
 from contextlib import suppress
+from json import dumps, loads
+from sys import getsizeof
+from time import perf_counter
 from typing import TYPE_CHECKING
 from shutil import move
 from aiosqlite import connect
 
+from ..expansion import BloomFilter
+from ..translation import _
+from .metrics import SQLITE_WRITE_DURATION, SQLITE_WRITE_ROWS
+from .static import ERROR
+from .tools import logging
+
 if TYPE_CHECKING:
     from ..module import Manager
 
-__all__ = ["IDRecorder", "DataRecorder", "MapRecorder"]
+__all__ = ["IDRecorder", "DataRecorder", "MapRecorder", "TaskRecorder"]
 
 
 class IDRecorder:
+    # 写入缓冲区达到 BATCH_SIZE 条或等待 FLUSH_INTERVAL 秒后批量提交
+    BATCH_SIZE = 100
+    FLUSH_INTERVAL = 0.5
+    # 写入失败后重试间隔逐次翻倍，最长 MAX_RETRY_INTERVAL 秒
+    MAX_RETRY_INTERVAL = 60
+    INSERT = "REPLACE INTO explore_id VALUES (?);"
+    # 下载记录数量超过 INDEX_LIMIT 时使用布隆过滤器代替集合，命中后再查询数据库确认
+    INDEX_LIMIT = 1_000_000
+
     def __init__(self, manager: "Manager"):
         self.name = "ExploreID.db"
         self.file = manager.root.joinpath(self.name)
         self.changed = False
         self.switch = manager.download_record
+        self.print = manager.print
         self.database = None
         self.cursor = None
+        self.pending: dict[str, tuple] = {}
+        self.writing: dict[str, tuple] = {}
+        self.failures = 0
+        self.flush_lock = Lock()
+        self.wake = Event()
+        self.full = Event()
+        self.flusher = None
+        self.index: set[str] | None = None
+        self.bloom: BloomFilter | None = None
 
     async def _connect_database(self):
         self.database = await connect(self.file)
+        await self._enable_wal()
         self.cursor = await self.database.cursor()
         await self.database.execute(
             "CREATE TABLE IF NOT EXISTS explore_id (ID TEXT PRIMARY KEY);"
         )
         await self.database.commit()
+        if self.switch:
+            await self._load_index()
+
+    async def _load_index(self):
+        start = perf_counter()
+        count = (await self._fetchone("SELECT COUNT(*) FROM explore_id;"))[0]
+        if count > self.INDEX_LIMIT:
+            self.bloom = BloomFilter(count * 2)
+            container = self.bloom
+        else:
+            self.index = container = set()
+        async with self.database.execute("SELECT ID FROM explore_id;") as cursor:
+            while rows := await cursor.fetchmany(10000):
+                for (id_,) in rows:
+                    container.add(id_)
+        logging(
+            self.print,
+            _("已加载 {0} 条下载记录，耗时 {1:.2f} 秒，占用内存 {2:.1f} MB").format(
+                count,
+                perf_counter() - start,
+                self.index_memory() / 1024 / 1024,
+            ),
+        )
+
+    def index_memory(self) -> int:
+        """下载记录索引占用内存，单位：字节"""
+        if self.bloom is not None:
+            return self.bloom.memory
+        if self.index is not None:
+            return getsizeof(self.index) + sum(getsizeof(i) for i in self.index)
+        return 0
+
+    async def _enable_wal(self):
+        await self.database.execute("PRAGMA journal_mode=WAL;")
+        await self.database.execute("PRAGMA synchronous=NORMAL;")
+
+    async def _fetchone(self, sql: str, parameters: tuple = ()):
+        # 每次查询使用独立游标，避免并发查询时结果互相覆盖
+        async with self.database.execute(sql, parameters) as cursor:
+            return await cursor.fetchone()
+
+    def _buffered(self, key: str) -> tuple | None:
+        return self.pending.get(key) or self.writing.get(key)
+
+    def _enqueue(self, key: str, row: tuple) -> None:
+        self.pending[key] = row
+        self.wake.set()
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.full.set()
+
+    async def __flush_loop(self):
+        while True:
+            await self.wake.wait()
+            with suppress(TimeoutError):
+                await wait_for(self.full.wait(), self.FLUSH_INTERVAL)
+            await self.flush()
+            if self.failures:
+                await sleep(
+                    min(
+                        self.FLUSH_INTERVAL * 2**self.failures,
+                        self.MAX_RETRY_INTERVAL,
+                    )
+                )
+
+    async def flush(self) -> None:
+        async with self.flush_lock:
+            self.wake.clear()
+            self.full.clear()
+            if not self.pending:
+                return
+            self.writing, self.pending = self.pending, {}
+            start = perf_counter()
+            try:
+                await self._write(list(self.writing.values()))
+                await self.database.commit()
+                SQLITE_WRITE_DURATION.observe(
+                    perf_counter() - start,
+                    database=self.name,
+                )
+                SQLITE_WRITE_ROWS.inc(len(self.writing), database=self.name)
+                self.failures = 0
+            except Exception as error:
+                # 连续失败时只记录第一次
+                if not self.failures:
+                    logging(
+                        self.print,
+                        _("写入数据库 {0} 失败：{1}").format(self.name, repr(error)),
+                        ERROR,
+                    )
+                self.failures += 1
+                # 保留未写入的数据，等待下次提交
+                self.pending = self.writing | self.pending
+                self.wake.set()
+            finally:
+                self.writing = {}
+
+    async def _write(self, rows: list[tuple]) -> None:
+        await self.database.executemany(self.INSERT, rows)
 
     async def select(self, id_: str):
         if self.switch:
-            await self.cursor.execute("SELECT ID FROM explore_id WHERE ID=?", (id_,))
-            return await self.cursor.fetchone()
+            if self._buffered(id_):
+                return (id_,)
+            if self.index is not None:
+                return (id_,) if id_ in self.index else None
+            if self.bloom is not None and id_ not in self.bloom:
+                return None
+            return await self._fetchone(
+                "SELECT ID FROM explore_id WHERE ID=?",
+                (id_,),
+            )
 
     async def add(
         self,
@@ -40,29 +175,42 @@ class IDRecorder:
         **kwargs,
     ) -> None:
         if self.switch:
-            await self.database.execute("REPLACE INTO explore_id VALUES (?);", (id_,))
-            await self.database.commit()
-
-    async def __delete(self, id_: str) -> None:
-        if id_:
-            await self.database.execute("DELETE FROM explore_id WHERE ID=?", (id_,))
-            await self.database.commit()
+            if self.index is not None:
+                self.index.add(id_)
+            elif self.bloom is not None:
+                self.bloom.add(id_)
+            self._enqueue(id_, (id_,))
 
     async def delete(self, ids: list[str]):
-        if self.switch:
-            [await self.__delete(i) for i in ids]
+        if self.switch and (ids := [(i,) for i in ids if i]):
+            if self.index is not None:
+                self.index.difference_update(i for (i,) in ids)
+            await self.flush()
+            await self.database.executemany("DELETE FROM explore_id WHERE ID=?", ids)
+            await self.database.commit()
 
     async def all(self):
         if self.switch:
+            await self.flush()
             await self.cursor.execute("SELECT ID FROM explore_id")
             return [i[0] for i in await self.cursor.fetchmany()]
 
     async def __aenter__(self):
         self.compatible()
         await self._connect_database()
+        self.flusher = create_task(self.__flush_loop())
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self.flusher:
+            self.flusher.cancel()
+            with suppress(CancelledError):
+                await self.flusher
+            self.flusher = None
+        await self.flush()
         with suppress(CancelledError):
             await self.cursor.close()
         await self.database.close()
@@ -100,6 +248,16 @@ class DataRecorder(IDRecorder):
         ("动图地址", "TEXT"),
         ("本地文件路径", "TEXT"),
     )
+    INDEXES = (
+        ("explore_data_author", "作者ID"),
+        ("explore_data_type", "作品类型"),
+        ("explore_data_published", "发布时间"),
+    )
+    INSERT = f"""REPLACE INTO explore_data (
+        {", ".join(i[0] for i in DATA_TABLE)}
+        ) VALUES (
+        {", ".join("?" for _ in DATA_TABLE)}
+        );"""
 
     def __init__(self, manager: "Manager"):
         super().__init__(manager)
@@ -110,11 +268,17 @@ class DataRecorder(IDRecorder):
 
     async def _connect_database(self):
         self.database = await connect(self.file)
+        await self._enable_wal()
         self.cursor = await self.database.cursor()
         await self.database.execute(f"""CREATE TABLE IF NOT EXISTS explore_data (
         {",".join(" ".join(i) for i in self.DATA_TABLE)}
         );""")
         await self.__compatible_columns()
+        # 数据查询接口的筛选条件
+        for name, column in self.INDEXES:
+            await self.database.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON explore_data ("{column}");'
+            )
         await self.database.commit()
 
     async def __compatible_columns(self):
@@ -132,18 +296,10 @@ class DataRecorder(IDRecorder):
 
     async def add(self, **kwargs) -> None:
         if self.switch:
-            await self.database.execute(
-                f"""REPLACE INTO explore_data (
-        {", ".join(i[0] for i in self.DATA_TABLE)}
-        ) VALUES (
-        {", ".join("?" for _ in self.DATA_TABLE)}
-        );""",
+            self._enqueue(
+                kwargs.get("作品ID", ""),
                 self.__generate_values(kwargs),
             )
-            await self.database.commit()
-
-    async def __delete(self, id_: str) -> None:
-        pass
 
     async def delete(self, ids: list | tuple):
         pass
@@ -156,6 +312,8 @@ class DataRecorder(IDRecorder):
 
 
 class MapRecorder(IDRecorder):
+    INSERT = "REPLACE INTO mapping_data VALUES (?, ?);"
+
     def __init__(self, manager: "Manager"):
         super().__init__(manager)
         self.name = "MappingData.db"
@@ -164,6 +322,7 @@ class MapRecorder(IDRecorder):
 
     async def _connect_database(self):
         self.database = await connect(self.file)
+        await self._enable_wal()
         self.cursor = await self.database.cursor()
         await self.database.execute(
             "CREATE TABLE IF NOT EXISTS mapping_data ("
@@ -175,29 +334,111 @@ class MapRecorder(IDRecorder):
 
     async def select(self, id_: str):
         if self.switch:
-            await self.cursor.execute(
-                "SELECT NAME FROM mapping_data WHERE ID=?", (id_,)
+            if row := self._buffered(id_):
+                return row[1:]
+            return await self._fetchone(
+                "SELECT NAME FROM mapping_data WHERE ID=?",
+                (id_,),
             )
-            return await self.cursor.fetchone()
 
     async def add(self, id_: str, name: str, *args, **kwargs) -> None:
         if self.switch:
-            await self.database.execute(
-                "REPLACE INTO mapping_data VALUES (?, ?);",
+            self._enqueue(
+                id_,
                 (
                     id_,
                     name,
                 ),
             )
-            await self.database.commit()
-
-    async def __delete(self, id_: str) -> None:
-        pass
 
     async def delete(self, ids: list[str]):
         pass
 
     async def all(self):
         if self.switch:
+            await self.flush()
             await self.cursor.execute("SELECT ID, NAME FROM mapping_data")
             return [i[0] for i in await self.cursor.fetchmany()]
+
+
+class TaskRecorder(IDRecorder):
+    INSERT = "REPLACE INTO tasks VALUES (?, ?, ?);"
+    INSERT_NOTE = "INSERT OR IGNORE INTO task_notes VALUES (?, ?);"
+
+    def __init__(self, manager: "Manager"):
+        super().__init__(manager)
+        self.name = "Tasks.db"
+        self.file = manager.root.joinpath(self.name)
+        self.changed = True
+        self.switch = True
+
+    async def _connect_database(self):
+        self.database = await connect(self.file)
+        await self._enable_wal()
+        self.cursor = await self.database.cursor()
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "ID TEXT PRIMARY KEY,"
+            "STATUS TEXT NOT NULL,"
+            "DATA TEXT NOT NULL"
+            ");"
+        )
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS task_notes ("
+            "TASK TEXT NOT NULL,"
+            "NOTE TEXT NOT NULL,"
+            "PRIMARY KEY (TASK, NOTE)"
+            ");"
+        )
+        await self.database.commit()
+
+    async def _write(self, rows: list[tuple]) -> None:
+        # 任务数据与已处理作品共用写入缓冲区，任务数据仅保留最新状态
+        tasks = [i[1:] for i in rows if i[0] == "task"]
+        notes = [i[1:] for i in rows if i[0] == "note"]
+        if tasks:
+            await self.database.executemany(self.INSERT, tasks)
+        if notes:
+            await self.database.executemany(self.INSERT_NOTE, notes)
+
+    async def select(self, id_: str) -> set[str]:
+        """任务已处理的作品 ID"""
+        await self.flush()
+        async with self.database.execute(
+            "SELECT NOTE FROM task_notes WHERE TASK=?",
+            (id_,),
+        ) as cursor:
+            return {i[0] for i in await cursor.fetchall()}
+
+    async def add(self, task: dict, *args, **kwargs) -> None:
+        self.save(task)
+
+    def save(self, task: dict) -> None:
+        self._enqueue(
+            task["task_id"],
+            (
+                "task",
+                task["task_id"],
+                task["status"],
+                # 错误信息保存在 deque 中
+                dumps(task, ensure_ascii=False, default=list),
+            ),
+        )
+
+    def add_note(self, task_id: str, note_id: str) -> None:
+        self._enqueue(f"{task_id}/{note_id}", ("note", task_id, note_id))
+
+    async def delete(self, ids: list[str]):
+        if ids := [(i,) for i in ids if i]:
+            await self.flush()
+            await self.database.executemany("DELETE FROM tasks WHERE ID=?", ids)
+            await self.database.executemany(
+                "DELETE FROM task_notes WHERE TASK=?",
+                ids,
+            )
+            await self.database.commit()
+
+    async def all(self) -> list[dict]:
+        await self.flush()
+        async with self.database.execute("SELECT DATA FROM tasks") as cursor:
+            return [loads(i[0]) for i in await cursor.fetchall()]
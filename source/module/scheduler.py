@@ -0,0 +1,223 @@
+from asyncio import Condition
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from time import perf_counter
+from urllib.parse import urlparse
+
+from .metrics import DOWNLOAD_BYTES, DOWNLOAD_FILES, DOWNLOAD_THROUGHPUT, DOWNLOAD_WAIT
+
+__all__ = ["DownloadScheduler"]
+
+
+class _Pool:
+    """容量可调整的并发槽位"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        # 正在等待或持有槽位的下载数量，为 0 时可以淘汰
+        self.users = 0
+        self.condition = Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    def try_acquire(self) -> bool:
+        """不等待，存在空闲槽位时获取"""
+        if self.active < self.limit:
+            self.active += 1
+            return True
+        return False
+
+    async def release(self):
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    async def resize(self, limit: int):
+        async with self.condition:
+            self.limit = limit
+            self.condition.notify_all()
+
+
+class _Window:
+    """AIMD 拥塞窗口，成功时线性增长，失败时减半"""
+
+    def __init__(self, size: int, maximum: int):
+        self.size = float(size)
+        self.maximum = maximum
+        self.throughput = 0.0
+
+    def success(self, throughput: float) -> None:
+        # 单个文件速率明显低于平均速率时视为带宽已饱和，不再增加并发
+        if not self.throughput or throughput >= self.throughput * 0.5:
+            self.size = min(self.maximum, self.size + 1 / self.size)
+        self.throughput = (
+            throughput
+            if not self.throughput
+            else self.throughput * 0.8 + throughput * 0.2
+        )
+
+    def failure(self) -> None:
+        self.size = max(1.0, self.size / 2)
+
+    @property
+    def limit(self) -> int:
+        return int(self.size)
+
+
+class _Slot:
+    __slots__ = ("kind", "host", "start", "size", "result")
+
+    def __init__(self, kind: str, host: str):
+        self.kind = kind
+        self.host = host
+        self.start = perf_counter()
+        self.size = 0
+        # True 表示下载成功，False 表示网络异常，None 表示与网络状况无关的结果
+        self.result: bool | None = None
+
+
+class DownloadScheduler:
+    """按文件类型与域名限制下载并发数，可选根据吞吐量与失败率自动调整并发数"""
+
+    KINDS = ("image", "video", "live")
+    # 保留的域名槽位数量上限，超出后淘汰最久未使用的空闲域名
+    MAX_HOSTS = 256
+    default = {
+        "image": 8,  # 图片文件最大并发数
+        "video": 2,  # 视频文件最大并发数
+        "live": 4,  # 动图文件最大并发数
+        "per_host": 8,  # 单个域名最大并发连接数
+        "adaptive": False,  # 是否自动调整并发数
+        "max_workers": 32,  # 自动调整时每种文件类型的最大并发数
+    }
+
+    def __init__(
+        self,
+        image: int = 8,
+        video: int = 2,
+        live: int = 4,
+        per_host: int = 8,
+        adaptive: bool = False,
+        max_workers: int = 32,
+    ):
+        self.limits = {
+            "image": image,
+            "video": video,
+            "live": live,
+        }
+        self.per_host = per_host
+        self.adaptive = adaptive
+        self.max_workers = max(max_workers, *self.limits.values())
+        self.pools = {k: _Pool(v) for k, v in self.limits.items()}
+        self.windows = {k: _Window(v, self.max_workers) for k, v in self.limits.items()}
+        self.hosts: OrderedDict[str, _Pool] = OrderedDict()
+
+    @classmethod
+    def from_settings(cls, data: dict | None) -> "DownloadScheduler":
+        params = cls.default.copy()
+        if isinstance(data, dict):
+            params |= {k: v for k, v in data.items() if k in params}
+        for key, value in params.items():
+            if key == "adaptive":
+                if not isinstance(value, bool):
+                    params[key] = cls.default[key]
+            elif isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                params[key] = cls.default[key]
+        return cls(**params)
+
+    @asynccontextmanager
+    async def slot(self, kind: str, url: str):
+        """先获取文件类型槽位，再获取域名槽位，顺序固定以避免死锁"""
+        pool = self.pools[kind]
+        slot = _Slot(kind, urlparse(url).hostname or "")
+        host = self.__host(slot.host)
+        used = False
+        try:
+            await pool.acquire()
+            try:
+                await host.acquire()
+                try:
+                    DOWNLOAD_WAIT.observe(perf_counter() - slot.start, kind=kind)
+                    slot.start = perf_counter()
+                    used = True
+                    yield slot
+                finally:
+                    await host.release()
+            finally:
+                await pool.release()
+        finally:
+            host.users -= 1
+            # 下载失败时抛出异常，同样需要记录结果并调整并发数
+            if used:
+                self.__record(slot)
+                if self.adaptive:
+                    await self.__feedback(slot)
+
+    @asynccontextmanager
+    async def connections(self, slot: _Slot, count: int):
+        """分段下载时为已获取槽位的文件获取同一域名的额外连接，返回可同时使用的连接数量
+
+        仅获取当前空闲的域名槽位，不等待其他下载释放，避免多个文件互相等待
+        """
+        host = self.hosts[slot.host]
+        extra = 0
+        while extra < count - 1 and host.try_acquire():
+            extra += 1
+        try:
+            yield extra + 1
+        finally:
+            for __ in range(extra):
+                await host.release()
+
+    @staticmethod
+    def __record(slot: _Slot):
+        DOWNLOAD_BYTES.inc(slot.size, kind=slot.kind)
+        match slot.result:
+            case True:
+                DOWNLOAD_FILES.inc(kind=slot.kind, result="success")
+                DOWNLOAD_THROUGHPUT.observe(
+                    slot.size / max(perf_counter() - slot.start, 1e-6),
+                    kind=slot.kind,
+                )
+            case False:
+                DOWNLOAD_FILES.inc(kind=slot.kind, result="failure")
+            case _:
+                DOWNLOAD_FILES.inc(kind=slot.kind, result="other")
+
+    def __host(self, host: str) -> _Pool:
+        if pool := self.hosts.get(host):
+            self.hosts.move_to_end(host)
+        else:
+            pool = self.hosts[host] = _Pool(self.per_host)
+        pool.users += 1
+        if (excess := len(self.hosts) - self.MAX_HOSTS) > 0:
+            # 仍有下载使用的域名保留，避免同一域名同时存在两组槽位
+            for key in [k for k, v in self.hosts.items() if not v.users][:excess]:
+                del self.hosts[key]
+        return pool
+
+    async def __feedback(self, slot: _Slot):
+        window = self.windows[slot.kind]
+        match slot.result:
+            case True:
+                window.success(slot.size / max(perf_counter() - slot.start, 1e-6))
+            case False:
+                window.failure()
+            case _:
+                return
+        if window.limit != self.pools[slot.kind].limit:
+            await self.pools[slot.kind].resize(window.limit)
+
+    def metrics(self) -> dict[str, dict[str, int | float]]:
+        return {
+            kind: {
+                "limit": pool.limit,
+                "active": pool.active,
+                "throughput": self.windows[kind].throughput,
+            }
+            for kind, pool in self.pools.items()
+        }
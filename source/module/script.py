@@ -1,29 +1,110 @@
+from asyncio import CancelledError, Semaphore, Task, create_task, gather
 from contextlib import suppress
-from json import loads
+from json import dumps, loads
+from types import SimpleNamespace
+from uuid import uuid4
 from websockets import ConnectionClosed, serve
 from typing import TYPE_CHECKING
 
+from ..expansion import QueueFullError
+from ..translation import _
+from .static import ERROR, WARNING
+
 if TYPE_CHECKING:
     from ..application import XHS
 
 
 class ScriptServer:
+    """接收用户脚本推送的作品
+
+    每条消息立即回复 ack 并交给任务调度器处理，处理过程中推送 progress 与 done 消息；
+    单个连接未完成的作品达到 MAX_IN_FLIGHT 个时暂停读取新消息
+    """
+
+    MAX_IN_FLIGHT = 8
+
     def __init__(
         self,
         core: "XHS",
         host="0.0.0.0",
         port=5558,
+        max_in_flight: int = MAX_IN_FLIGHT,
     ):
         self.core = core
         self.host = host
         self.port = port
+        self.max_in_flight = max_in_flight
         self.server = None
+        self.jobs: set[Task] = set()
 
     async def handler(self, websocket):
+        client = str(websocket.id)
+        limit = Semaphore(self.max_in_flight)
         with suppress(ConnectionClosed):
             async for message in websocket:
-                data = loads(message)
-                await self.core.deal_script_tasks(**data)
+                try:
+                    data = loads(message)
+                    note = data["data"]["noteId"]
+                except (ValueError, TypeError, KeyError):
+                    await self.__send(
+                        websocket,
+                        {"type": "error", "message": _("作品数据格式错误")},
+                    )
+                    continue
+                await limit.acquire()
+                job = uuid4().hex
+                await self.__send(
+                    websocket,
+                    {"type": "ack", "job": job, "note": note, "status": "queued"},
+                )
+                # 连接断开后已接收的作品继续处理
+                task = create_task(self.__process(websocket, client, job, data, limit))
+                self.jobs.add(task)
+                task.add_done_callback(self.jobs.discard)
+
+    async def __process(
+        self,
+        websocket,
+        client: str,
+        job: str,
+        data: dict,
+        limit: Semaphore,
+    ):
+        count = SimpleNamespace(all=1, success=0, fail=0, skip=0)
+        message = ""
+        try:
+            async with self.core.jobs.slot("script", client):
+                await self.__send(
+                    websocket,
+                    {"type": "progress", "job": job, "status": "running"},
+                )
+                await self.core.deal_script_tasks(**data, count=count)
+        except QueueFullError as error:
+            self.core.logging(str(error), WARNING)
+            count.fail, message = 1, str(error)
+        except Exception as error:
+            # 任何异常都需要回复 done 消息，避免用户脚本一直等待
+            self.core.logging(
+                _("处理用户脚本推送的作品失败：{0}").format(repr(error)), ERROR
+            )
+            count.fail, message = 1, repr(error)
+        finally:
+            limit.release()
+        if count.fail:
+            status = "fail"
+        elif count.skip:
+            status = "skip"
+        else:
+            status = "success"
+        await self.__send(
+            websocket,
+            {"type": "done", "job": job, "status": status, "message": message},
+        )
+
+    @staticmethod
+    async def __send(websocket, data: dict):
+        with suppress(ConnectionClosed):
+            await websocket.send(dumps(data, ensure_ascii=False))
 
     async def start(self):
         """启动服务器"""
@@ -35,6 +116,10 @@ class ScriptServer:
 
     async def stop(self):
         """停止服务器"""
+        for task in self.jobs:
+            task.cancel()
+        with suppress(CancelledError):
+            await gather(*self.jobs, return_exceptions=True)
         if self.server:
             self.server.close()
             await self.server.wait_closed()
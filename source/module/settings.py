@@ -34,6 +34,51 @@ class Settings:
         "write_mtime": False,  # 是否写入修改时间
         "language": "zh_CN",  # 语言设置
         "script_server": False,  # 是否启用脚本服务器
+        "concurrency": 1,  # 批量处理作品的最大并发数
+        "rate_limit": {  # 请求速率限制，按域名独立计算
+            "mode": "adaptive",  # 限速模式：fixed、token_bucket、adaptive
+            "rate": 0.2,  # 初始速率，单位：请求/秒
+            "min_rate": 0.05,  # 最低速率
+            "max_rate": 1.0,  # 最高速率
+            "burst": 1,  # 令牌桶容量
+            "increase": 0.02,  # 响应正常时速率增加值
+            "decrease": 0.5,  # 被限流时速率乘数
+        },
+        "download_scheduler": {  # 下载并发设置
+            "image": 8,  # 图片文件最大并发数
+            "video": 2,  # 视频文件最大并发数
+            "live": 4,  # 动图文件最大并发数
+            "per_host": 8,  # 单个域名最大并发连接数
+            "adaptive": False,  # 是否根据吞吐量与失败率自动调整并发数
+            "max_workers": 32,  # 自动调整时每种文件类型的最大并发数
+        },
+        "segment_download": {  # 视频文件分段下载设置
+            "enable": False,  # 是否启用分段下载
+            "min_size": 200,  # 启用分段下载的最小文件大小，单位：MB
+            "segments": 4,  # 分段数量
+        },
+        "job_scheduler": {  # 作品处理任务调度设置
+            "workers": 4,  # 同时处理的任务数量
+            "max_queue": 100,  # 等待执行的任务数量上限
+        },
+        "download_client": {  # 文件下载连接设置
+            "http2": True,  # 是否启用 HTTP/2
+            "max_connections": 32,  # 最大连接数
+            "max_keepalive_connections": 16,  # 最大空闲连接数
+            "keepalive_expiry": 30,  # 空闲连接保留时间，单位：秒
+            "dns_cache": 0,  # 域名解析结果缓存时间，单位：秒，0 表示不缓存
+        },
+        "media_cache": {  # 文件缓存设置，相同文件只下载一次
+            "enable": False,  # 是否启用文件缓存
+            "max_age": 30,  # 下载目录中的文件删除后缓存保留天数
+        },
+        "retry_policy": {  # 请求重试与熔断设置
+            "base_delay": 1.0,  # 首次重试前的等待时间，单位：秒
+            "max_delay": 30.0,  # 单次重试等待时间上限，单位：秒
+            "throttled_factor": 4.0,  # 被限流时等待时间乘数
+            "failure_threshold": 5,  # 同一域名连续失败多少次后暂停请求
+            "recovery_time": 60.0,  # 暂停请求的时间，单位：秒
+        },
     }
     # 根据操作系统设置编码格式
     encode = "UTF-8-SIG" if system() == "Windows" else "UTF-8"
@@ -1,11 +1,21 @@
+from asyncio import Queue, QueueFull
+from collections import deque
 from datetime import datetime
+from time import time
+from typing import TYPE_CHECKING
 from uuid import uuid4
 
+if TYPE_CHECKING:
+    from .recorder import TaskRecorder
+
 __all__ = ["TaskManager"]
 
 
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
 def _now() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return datetime.now().strftime(TIME_FORMAT)
 
 
 def _empty_statistics() -> dict[str, int]:
@@ -19,10 +29,37 @@ def _empty_statistics() -> dict[str, int]:
 
 
 class TaskManager:
-    def __init__(self):
+    # 已结束的任务保留时长，单位：秒
+    TTL = 7 * 24 * 60 * 60
+    UNFINISHED = {"pending", "running"}
+    # 每个任务保留的最近错误信息数量
+    MAX_ERRORS = 100
+    # 订阅者未读取的事件数量上限，超出后清空并通知订阅者重新获取订阅范围内的任务状态
+    MAX_EVENTS = 256
+
+    def __init__(self, ttl: int = TTL, max_errors: int = MAX_ERRORS):
         self.tasks: dict[str, dict] = {}
+        self.ttl = ttl
+        self.max_errors = max_errors
+        self.store: "TaskRecorder | None" = None
+        # 键为任务 ID，None 表示订阅全部任务
+        self.subscribers: dict[str | None, set[Queue]] = {}
+
+    async def load(self, store: "TaskRecorder") -> list[dict]:
+        """从数据库恢复任务，返回需要继续执行的任务"""
+        self.store = store
+        for task in await store.all():
+            task["errors"] = deque(task["errors"], self.max_errors)
+            task.setdefault("error_count", len(task["errors"]))
+            self.tasks.setdefault(task["task_id"], task)
+        await self.expire()
+        return [
+            self.get(i["task_id"])
+            for i in self.tasks.values()
+            if i["status"] in self.UNFINISHED and i.get("params")
+        ]
 
-    def create(self, mode: str) -> str:
+    def create(self, mode: str, params: dict = None) -> str:
         task_id = uuid4().hex
         self.tasks[task_id] = {
             "task_id": task_id,
@@ -32,25 +69,109 @@ class TaskManager:
             "finished_at": None,
             "progress": _empty_statistics(),
             "summary": _empty_statistics(),
-            "errors": [],
+            "errors": deque(maxlen=self.max_errors),
+            "error_count": 0,
+            # 恢复任务所需的参数与分页位置
+            "params": params or {},
+            "cursor": "",
         }
+        self.__save(task_id)
+        self.__publish_status(task_id)
         return task_id
 
+    def __save(self, task_id: str):
+        if self.store and (task := self.tasks.get(task_id)):
+            self.store.save(task)
+
+    def subscribe(self, task_id: str = None) -> Queue:
+        """订阅任务事件，task_id 为 None 时订阅全部任务"""
+        queue = Queue(self.MAX_EVENTS)
+        self.subscribers.setdefault(task_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: Queue, task_id: str = None):
+        if (queues := self.subscribers.get(task_id)) is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[task_id]
+
+    def __publish(self, task_id: str, event: str, data: dict):
+        if not self.subscribers:
+            return
+        event = {"event": event, "task_id": task_id, **data}
+        for key in (task_id, None):
+            for queue in self.subscribers.get(key, ()):
+                try:
+                    queue.put_nowait(event)
+                except QueueFull:
+                    # 订阅者读取过慢，丢弃积压的增量事件；
+                    # 订阅全部任务时队列包含多个任务的事件，需要重新获取全部任务状态
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait({"event": "reset", "task_id": key})
+
+    def __publish_status(self, task_id: str):
+        task = self.tasks[task_id]
+        self.__publish(
+            task_id,
+            "status",
+            {
+                "status": task["status"],
+                "started_at": task["started_at"],
+                "finished_at": task["finished_at"],
+                "progress": task["progress"].copy(),
+            },
+        )
+
+    async def expire(self):
+        deadline = time() - self.ttl
+        if expired := [
+            k
+            for k, v in self.tasks.items()
+            if v["finished_at"]
+            and datetime.strptime(v["finished_at"], TIME_FORMAT).timestamp() < deadline
+        ]:
+            for task_id in expired:
+                del self.tasks[task_id]
+            if self.store:
+                await self.store.delete(expired)
+
+    async def processed(self, task_id: str) -> set[str]:
+        """任务已处理的作品 ID"""
+        return await self.store.select(task_id) if self.store else set()
+
+    def checkpoint(self, task_id: str, note_id: str, cursor: str):
+        """记录已处理的作品与恢复任务时开始请求的分页位置"""
+        if task := self.tasks.get(task_id):
+            task["cursor"] = cursor
+            if self.store:
+                self.store.add_note(task_id, note_id)
+            self.__save(task_id)
+
     def get(self, task_id: str) -> dict | None:
         if task := self.tasks.get(task_id):
             # Avoid external mutation.
             return {
                 **task,
+                "params": task["params"].copy(),
                 "progress": task["progress"].copy(),
                 "summary": task["summary"].copy(),
                 "errors": list(task["errors"]),
             }
         return None
 
+    def snapshot(self, task_id: str = None) -> list[dict]:
+        """订阅开始时发送的任务状态，task_id 为 None 时返回全部任务"""
+        if task_id:
+            return [self.get(task_id)] if task_id in self.tasks else []
+        return [self.get(i) for i in self.tasks]
+
     def mark_running(self, task_id: str, all_count: int = 0):
         if task := self.tasks.get(task_id):
             task["status"] = "running"
             task["progress"]["all"] = all_count
+            self.__save(task_id)
+            self.__publish_status(task_id)
 
     def update_progress(
         self,
@@ -63,17 +184,36 @@ class TaskManager:
         filtered: int,
     ):
         if task := self.tasks.get(task_id):
-            task["progress"] = {
-                "all": all_count,
-                "success": success,
-                "fail": fail,
-                "skip": skip,
-                "filtered": filtered,
-            }
+            # 并发处理作品时进度可能乱序提交，各项计数只增不减
+            progress = task["progress"]
+            changed = {}
+            for key, value in (
+                ("all", all_count),
+                ("success", success),
+                ("fail", fail),
+                ("skip", skip),
+                ("filtered", filtered),
+            ):
+                if value > progress[key]:
+                    progress[key] = changed[key] = value
+            if changed:
+                self.__save(task_id)
+                # 仅发送发生变化的计数
+                self.__publish(task_id, "progress", {"progress": changed})
 
     def add_error(self, task_id: str, message: str):
         if task := self.tasks.get(task_id):
-            task["errors"].append(message)
+            self.__append_error(task, message)
+            self.__save(task_id)
+
+    def __append_error(self, task: dict, message: str):
+        task["errors"].append(message)
+        task["error_count"] += 1
+        self.__publish(
+            task["task_id"],
+            "error",
+            {"message": message, "error_count": task["error_count"]},
+        )
 
     def complete(
         self,
@@ -97,6 +237,8 @@ class TaskManager:
             task["finished_at"] = _now()
             task["progress"] = summary
             task["summary"] = summary
+            self.__save(task_id)
+            self.__publish_status(task_id)
 
     def fail(
         self,
@@ -112,7 +254,7 @@ class TaskManager:
         if task := self.tasks.get(task_id):
             task["status"] = "failed"
             task["finished_at"] = _now()
-            task["errors"].append(reason)
+            self.__append_error(task, reason)
             summary = {
                 "all": all_count,
                 "success": success,
@@ -122,3 +264,5 @@ class TaskManager:
             }
             task["progress"] = summary
             task["summary"] = summary
+            self.__save(task_id)
+            self.__publish_status(task_id)
@@ -5,18 +5,43 @@ from typing import Callable
 from rich import print
 from rich.text import Text
 
+from ..expansion import RequestError
 from ..translation import _
+from .metrics import RETRIES, RETRY_BACKOFF, RETRY_EXHAUSTED
 from .static import INFO
 
 
 def retry(function):
+    """返回值为假或抛出 RequestError 时重试
+
+    永久性错误立即停止，其余错误按 self.retry_policy 指数退避后重试；
+    放弃重试时返回 RequestError.result，该值为 None 时重新抛出异常
+    """
+
     async def inner(self, *args, **kwargs):
-        if result := await function(self, *args, **kwargs):
-            return result
-        for __ in range(self.retry):
-            if result := await function(self, *args, **kwargs):
+        name = function.__name__
+        attempt = 0
+        while True:
+            error = None
+            try:
+                if result := await function(self, *args, **kwargs):
+                    return result
+                kind = RequestError.TRANSIENT
+            except RequestError as e:
+                error, result, kind = e, e.result, e.kind
+            if attempt >= self.retry or kind in {
+                RequestError.PERMANENT,
+                RequestError.CIRCUIT_OPEN,
+            }:
+                RETRY_EXHAUSTED.inc(function=name, kind=kind)
+                if error and result is None:
+                    raise error
                 return result
-        return result
+            attempt += 1
+            delay = self.retry_policy.delay(attempt, kind)
+            RETRIES.inc(function=name, kind=kind)
+            RETRY_BACKOFF.inc(delay, function=name)
+            await sleep(delay)
 
     return inner
 
@@ -0,0 +1,249 @@
+from asyncio import Task, create_task, get_running_loop, shield
+from contextlib import contextmanager
+from socket import SOCK_STREAM
+from time import monotonic
+
+import httpcore
+from httpx import (
+    AsyncBaseTransport,
+    AsyncByteStream,
+    ConnectError,
+    ConnectTimeout,
+    LocalProtocolError,
+    NetworkError,
+    PoolTimeout,
+    ProtocolError,
+    Proxy,
+    ProxyError,
+    ReadError,
+    ReadTimeout,
+    RemoteProtocolError,
+    Request,
+    Response,
+    TimeoutException,
+    UnsupportedProtocol,
+    WriteError,
+    WriteTimeout,
+    create_ssl_context,
+)
+
+from .metrics import DNS_CACHE, DOWNLOAD_CONNECTIONS, DOWNLOAD_REQUESTS
+
+__all__ = ["CDNTransport"]
+
+
+class _Backend(httpcore.AsyncNetworkBackend):
+    """统计新建连接数量，可选缓存域名解析结果"""
+
+    def __init__(self, dns_ttl: int | float = 0):
+        self.backend = httpcore.AnyIOBackend()
+        self.dns_ttl = dns_ttl
+        self.dns: dict[tuple[str, int], tuple[float, str]] = {}
+        self.resolving: dict[tuple[str, int], Task] = {}
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options=None,
+    ):
+        DOWNLOAD_CONNECTIONS.inc(host=host)
+        address = await self.__resolve(host, port) if self.dns_ttl else host
+        # TLS 握手使用请求中的域名，连接 IP 地址不影响证书校验
+        return await self.backend.connect_tcp(
+            address,
+            port,
+            timeout,
+            local_address,
+            socket_options,
+        )
+
+    async def __resolve(self, host: str, port: int) -> str:
+        key = (host, port)
+        if (cache := self.dns.get(key)) and cache[0] > monotonic():
+            DNS_CACHE.inc(result="hit")
+            return cache[1]
+        # 同时建立的多个连接共用同一次域名解析
+        if task := self.resolving.get(key):
+            DNS_CACHE.inc(result="hit")
+        else:
+            DNS_CACHE.inc(result="miss")
+            task = self.resolving[key] = create_task(self.__lookup(host, port))
+        return await shield(task)
+
+    async def __lookup(self, host: str, port: int) -> str:
+        try:
+            info = await get_running_loop().getaddrinfo(host, port, type=SOCK_STREAM)
+        except OSError:
+            # 交给默认连接流程处理并抛出异常
+            return host
+        finally:
+            self.resolving.pop((host, port), None)
+        address = info[0][4][0]
+        self.dns[(host, port)] = (monotonic() + self.dns_ttl, address)
+        return address
+
+    async def connect_unix_socket(self, *args, **kwargs):
+        return await self.backend.connect_unix_socket(*args, **kwargs)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+_EXCEPTIONS = {
+    httpcore.TimeoutException: TimeoutException,
+    httpcore.ConnectTimeout: ConnectTimeout,
+    httpcore.ReadTimeout: ReadTimeout,
+    httpcore.WriteTimeout: WriteTimeout,
+    httpcore.PoolTimeout: PoolTimeout,
+    httpcore.NetworkError: NetworkError,
+    httpcore.ConnectError: ConnectError,
+    httpcore.ReadError: ReadError,
+    httpcore.WriteError: WriteError,
+    httpcore.ProxyError: ProxyError,
+    httpcore.UnsupportedProtocol: UnsupportedProtocol,
+    httpcore.ProtocolError: ProtocolError,
+    httpcore.LocalProtocolError: LocalProtocolError,
+    httpcore.RemoteProtocolError: RemoteProtocolError,
+}
+
+
+class _ResponseStream(AsyncByteStream):
+    def __init__(self, stream, request: Request):
+        self.stream = stream
+        self.request = request
+
+    async def __aiter__(self):
+        with _map_exceptions(self.request):
+            async for chunk in self.stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self.stream, "aclose"):
+            with _map_exceptions(self.request):
+                await self.stream.aclose()
+
+
+@contextmanager
+def _map_exceptions(request: Request):
+    """将 httpcore 异常转换为对应的 httpx 异常，与 httpx 默认传输层的行为一致"""
+    try:
+        yield
+    except Exception as error:
+        for type_ in type(error).__mro__:
+            if mapped := _EXCEPTIONS.get(type_):
+                raise mapped(str(error), request=request) from error
+        raise
+
+
+class CDNTransport(AsyncBaseTransport):
+    """下载文件使用的传输层
+
+    启用 HTTP/2 后同一域名的并发请求复用少量连接，减少 TLS 握手次数；
+    通过 httpcore 连接池的 network_backend 参数统计新建连接并缓存域名解析结果
+    """
+
+    default = {
+        "http2": True,  # 是否启用 HTTP/2
+        "max_connections": 32,  # 最大连接数
+        "max_keepalive_connections": 16,  # 最大空闲连接数
+        "keepalive_expiry": 30,  # 空闲连接保留时间，单位：秒
+        "dns_cache": 0,  # 域名解析结果缓存时间，单位：秒，0 表示不缓存
+    }
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        keepalive_expiry: int | float = 30,
+        dns_cache: int | float = 0,
+        proxy: str | None = None,
+        verify: bool = True,
+    ):
+        self.backend = _Backend(dns_cache)
+        options = {
+            "ssl_context": create_ssl_context(verify=verify),
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+            "http1": True,
+            "http2": http2,
+            "network_backend": self.backend,
+        }
+        if not proxy:
+            self.pool = httpcore.AsyncConnectionPool(**options)
+            return
+        proxy = Proxy(proxy)
+        url = httpcore.URL(
+            scheme=proxy.url.raw_scheme,
+            host=proxy.url.raw_host,
+            port=proxy.url.port,
+            target=proxy.url.raw_path,
+        )
+        if proxy.url.scheme in ("http", "https"):
+            self.pool = httpcore.AsyncHTTPProxy(
+                proxy_url=url,
+                proxy_auth=proxy.raw_auth,
+                proxy_headers=proxy.headers.raw,
+                proxy_ssl_context=proxy.ssl_context,
+                **options,
+            )
+        elif proxy.url.scheme in ("socks5", "socks5h"):
+            self.pool = httpcore.AsyncSOCKSProxy(
+                proxy_url=url,
+                proxy_auth=proxy.raw_auth,
+                **options,
+            )
+        else:
+            raise ValueError(f"Unsupported proxy protocol: {proxy.url.scheme}")
+
+    @classmethod
+    def from_settings(cls, data: dict | None, **kwargs) -> "CDNTransport":
+        params = cls.default.copy()
+        if isinstance(data, dict):
+            params |= {k: v for k, v in data.items() if k in params}
+        for key, value in params.items():
+            if key == "http2":
+                if not isinstance(value, bool):
+                    params[key] = cls.default[key]
+            elif isinstance(value, bool) or not isinstance(value, int | float):
+                params[key] = cls.default[key]
+            elif value < 0 or (value == 0 and key != "dns_cache"):
+                params[key] = cls.default[key]
+        for key in ("max_connections", "max_keepalive_connections"):
+            params[key] = int(params[key])
+        return cls(**params, **kwargs)
+
+    async def handle_async_request(self, request: Request) -> Response:
+        with _map_exceptions(request):
+            response = await self.pool.handle_async_request(
+                httpcore.Request(
+                    method=request.method,
+                    url=httpcore.URL(
+                        scheme=request.url.raw_scheme,
+                        host=request.url.raw_host,
+                        port=request.url.port,
+                        target=request.url.raw_path,
+                    ),
+                    headers=request.headers.raw,
+                    content=request.stream,
+                    extensions=request.extensions,
+                )
+            )
+        # 与新建连接数量对比即可得到连接复用比例
+        DOWNLOAD_REQUESTS.inc(
+            host=request.url.host,
+            version=response.extensions.get("http_version", b"").decode(),
+        )
+        return Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
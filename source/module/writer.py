@@ -0,0 +1,79 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .static import FILE_SIGNATURES_LENGTH
+
+__all__ = ["FileWriter"]
+
+
+class FileWriter:
+    """合并数据块后在专用线程中写入文件，避免每个数据块切换一次线程
+
+    position 为 None 时按 mode 顺序写入，否则从 position 开始按偏移量写入
+    """
+
+    BUFFER_SIZE = 4 * 1024 * 1024
+    # 所有文件共用一个写入线程，磁盘写入本身无法并行加速
+    EXECUTOR = ThreadPoolExecutor(1, thread_name_prefix="FileWriter")
+
+    def __init__(
+        self,
+        path: Path,
+        mode: str = "ab",
+        position: int = None,
+        buffer_size: int = BUFFER_SIZE,
+    ):
+        self.path = path
+        self.mode = mode
+        self.position = position
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.file = None
+        # 从文件开头写入时保留开头的数据，用于判断文件格式
+        self.head = bytearray() if self.__from_start() else None
+
+    def __from_start(self) -> bool:
+        if self.position is not None:
+            return self.position == 0
+        return (
+            "w" in self.mode or not self.path.is_file() or not self.path.stat().st_size
+        )
+
+    async def __run(self, function, *args):
+        return await get_running_loop().run_in_executor(self.EXECUTOR, function, *args)
+
+    async def __aenter__(self):
+        self.file = await self.__run(self.path.open, self.mode)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        try:
+            await self.flush()
+        finally:
+            await self.__run(self.file.close)
+
+    async def write(self, data: bytes) -> None:
+        if self.head is not None and len(self.head) < FILE_SIGNATURES_LENGTH:
+            self.head += data[: FILE_SIGNATURES_LENGTH - len(self.head)]
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.buffer:
+            return
+        data, self.buffer = self.buffer, bytearray()
+        await self.__run(self.__write, data)
+
+    def __write(self, data: bytearray) -> None:
+        # 每个 FileWriter 独占文件句柄且写入线程唯一，定位与写入之间不会被打断
+        if self.position is not None:
+            self.file.seek(self.position)
+            self.position += len(data)
+        self.file.write(data)
+
+    @property
+    def signature(self) -> bytes | None:
+        """文件开头的数据，未从文件开头写入时返回 None"""
+        return bytes(self.head) if self.head is not None else None